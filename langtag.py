@@ -8,6 +8,7 @@
 #
 
 import json
+import re
 
 #
 # Exceptions
@@ -1237,6 +1238,15 @@ def tagsep(s):
   else:
     return s
 
+# Cache of compiled regular expression patterns for format strings that
+# have been passed to matchformat().
+#
+# Only a small, fixed set of format strings is ever used, so each
+# distinct format string is compiled into a regular expression once and
+# then reused on all subsequent calls.
+#
+matchformat_cache = dict()
+
 # Check whether a given string matches a given format.
 #
 # s is the string value to check for a match.
@@ -1263,45 +1273,39 @@ def tagsep(s):
 #   True if there is a match, False if there is not
 #
 def matchformat(s, fstr):
-  
+
   # Check parameters
   if not isinstance(s, str) or not isinstance(fstr, str):
     raise LogicError()
-  
-  for c in fstr:
-    if (c != 'a') and (c != 'A') and (c != 'D'):
-      raise LogicError()
-  
-  # If length of given string doesn't match length of format string, no
-  # match
-  if len(s) != len(fstr):
+
+  # Look up the compiled pattern for this format string in the cache,
+  # compiling and caching it first if this is a new format string
+  pat = matchformat_cache.get(fstr)
+  if pat is None:
+
+    # Translate each charset code into a character class, raising an
+    # exception if an unrecognized charset code is encountered
+    charsets = []
+    for c in fstr:
+      if c == 'a':
+        charsets.append('[a-z]')
+      elif c == 'A':
+        charsets.append('[A-Z]')
+      elif c == 'D':
+        charsets.append('[0-9]')
+      else:
+        raise LogicError()
+
+    # Compile the pattern, anchored at the end so that the whole string
+    # must match; matching already anchors the start
+    pat = re.compile(''.join(charsets) + r'\Z')
+    matchformat_cache[fstr] = pat
+
+  # Check the given string against the compiled pattern
+  if pat.match(s) is not None:
+    return True
+  else:
     return False
-  
-  # Check that each character is appropriate
-  for x in range(0, len(fstr)):
-    
-    # Get current character code and charset
-    c = ord(s[x])
-    cs = fstr[x]
-    
-    # Check that character code is in charset
-    if cs == 'a':
-      if (c < ord('a')) or (c > ord('z')):
-        return False
-      
-    elif cs == 'A':
-      if (c < ord('A')) or (c > ord('Z')):
-        return False
-      
-    elif cs == 'D':
-      if (c < ord('0')) or (c > ord('9')):
-        return False
-      
-    else:
-      raise LogicError()
-  
-  # If we got all the way here, there is a match
-  return True
 
 #
 # Class definitions
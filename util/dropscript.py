@@ -29,7 +29,7 @@
 # dictionary out to standard output as JSON text.
 #
 
-import io
+import json
 import subtag
 import sys
 
@@ -53,44 +53,15 @@ except subtag.SubtagError as exc:
   print(exc)
   sys.exit(1)
 
-# Begin the JSON output
+# Go through the parsed subtag records and build the dictionary from
+# the language records that have a suppress-script field
 #
-jsr = io.StringIO()
-jsr.write('{')
-
-# Go through the parsed subtag records and build the dictionary entries
-#
-first_rec = True
+result = dict()
 for rr in subtag.rec:
-  
-  # Get current record fields
   r = rr[1]
-  
-  # Skip if this is not a language record
-  if r['type'] != 'language':
-    continue
-  
-  # Skip if there is no suppress-script field
-  if 'suppress-script' not in r:
-    continue
-  
-  # We found the record so print the mapping -- no escaping is necessary
-  # since subtags just have alphanumeric characters
-  if first_rec:
-    jsr.write('\n')
-    first_rec = False
-  else:
-    jsr.write(',\n')
-  jsr.write('  "')
-  jsr.write(r['subtag'])
-  jsr.write('": "')
-  jsr.write(r['suppress-script'])
-  jsr.write('"')
-
-# End the JSON output
-#
-jsr.write('\n}')
+  if (r['type'] == 'language') and ('suppress-script' in r):
+    result[r['subtag']] = r['suppress-script']
 
-# Write the full JSON object to output
+# Serialize the full dictionary to output as JSON
 #
-print(jsr.getvalue())
+print(json.dumps(result, indent=2))
@@ -29,10 +29,15 @@
 # dictionary out to standard output as JSON text.
 #
 
-import io
+import json
 import subtag
 import sys
 
+# The record types that contribute entries to the elaboration remapping
+# dictionary
+#
+ela_types = frozenset(('script', 'region', 'variant'))
+
 # Check that we have exactly one parameter
 #
 if len(sys.argv) != 2:
@@ -53,46 +58,15 @@ except subtag.SubtagError as exc:
   print(exc)
   sys.exit(1)
 
-# Begin the JSON output
-#
-jsr = io.StringIO()
-jsr.write('{')
-
-# Go through the parsed subtag records and build the dictionary entries
+# Go through the parsed subtag records and build the dictionary from
+# the records of relevant type that have a preferred-value mapping
 #
-first_rec = True
+result = dict()
 for rr in subtag.rec:
-  
-  # Get current record fields
   r = rr[1]
-  
-  # Skip if this is not a script, region, or variant record
-  if (r['type'] != 'script') and \
-      (r['type'] != 'region') and \
-      (r['type'] != 'variant'):
-    continue
-  
-  # Skip if there is no preferred-value mapping
-  if 'preferred-value' not in r:
-    continue
-  
-  # We found the record so print the mapping -- no escaping is necessary
-  # since subtags just have alphanumeric characters
-  if first_rec:
-    jsr.write('\n')
-    first_rec = False
-  else:
-    jsr.write(',\n')
-  jsr.write('  "')
-  jsr.write(r['subtag'])
-  jsr.write('": "')
-  jsr.write(r['preferred-value'])
-  jsr.write('"')
-
-# End the JSON output
-#
-jsr.write('\n}')
+  if (r['type'] in ela_types) and ('preferred-value' in r):
+    result[r['subtag']] = r['preferred-value']
 
-# Write the full JSON object to output
+# Serialize the full dictionary to output as JSON
 #
-print(jsr.getvalue())
+print(json.dumps(result, indent=2))
@@ -9,7 +9,8 @@
 # Use the parse_all function to load all the individual database modules
 # and check consistency across them.
 #
-# For corrected records, see the fix_ functions.
+# For corrected records, see the exceptional language code sets in the
+# local constants section.
 #
 # This makes use of the following imported modules:
 #
@@ -108,296 +109,114 @@ class SubtagMappingError(FullDBError):
 #   .iso3_retire_path
 #   .iso5_path
 #
-# Each of these is initially set to None.  Property "set" methods check
+# Each of these is initially set to None.  Attribute assignment checks
 # that the given value is a non-empty string, throwing an exception if
-# it is not.  Property "get" methods throw an exception if an attempt is
-# made to read a property that hasn't been set yet.  Attempts to delete
-# any of the properties cause exceptions.
+# it is not.  Attempts to delete any of the attributes cause
+# exceptions.
+#
+# The attributes are stored in __slots__ rather than behind property
+# descriptors, so reads are plain slot lookups with no Python-level
+# method call.
 #
 # The completed() function only returns True if all fields have been
-# filled in and all properties can be accessed without exceptions.
+# filled in.
 #
 class DataFilePaths:
-  
+
+  # The names of all the path fields
+  #
+  _FIELDS = (
+    'subtag_path',
+    'iso2_path',
+    'iso3_code_path',
+    'iso3_name_path',
+    'iso3_macro_path',
+    'iso3_retire_path',
+    'iso5_path')
+
+  __slots__ = _FIELDS
+
   # Constructor just initializes all fields to None
   #
   def __init__(self):
-    self.m_subtag = None
-    self.m_iso2 = None
-    self.m_iso3_code = None
-    self.m_iso3_name = None
-    self.m_iso3_macro = None
-    self.m_iso3_retire = None
-    self.m_iso5 = None
-  
-  # Function to check whether all the fields have been filled in.
-  #
-  # Return:
-  #
-  #   True if everything filled in, False otherwise
-  #
-  def completed(self):
-    if (self.m_subtag is not None) and \
-        (self.m_iso2 is not None) and \
-        (self.m_iso3_code is not None) and \
-        (self.m_iso3_name is not None) and \
-        (self.m_iso3_macro is not None) and \
-        (self.m_iso3_retire is not None) and \
-        (self.m_iso5 is not None):
-      return True
-    else:
-      return False
-  
-  # Set methods 
+    for n in DataFilePaths._FIELDS:
+      object.__setattr__(self, n, None)
+
+  # Setting any of the fields checks that the new value is a non-empty
+  # string
   #
-  def set_subtag(self, value):
-    if not isinstance(value, str):
-      raise LogicError()
-    if len(value) < 1:
-      raise LogicError()
-    self.m_subtag = value
-  
-  def set_iso2(self, value):
+  def __setattr__(self, name, value):
     if not isinstance(value, str):
       raise LogicError()
     if len(value) < 1:
       raise LogicError()
-    self.m_iso2 = value
-  
-  def set_iso3_code(self, value):
-    if not isinstance(value, str):
-      raise LogicError()
-    if len(value) < 1:
-      raise LogicError()
-    self.m_iso3_code = value
-  
-  def set_iso3_name(self, value):
-    if not isinstance(value, str):
-      raise LogicError()
-    if len(value) < 1:
-      raise LogicError()
-    self.m_iso3_name = value
-  
-  def set_iso3_macro(self, value):
-    if not isinstance(value, str):
-      raise LogicError()
-    if len(value) < 1:
-      raise LogicError()
-    self.m_iso3_macro = value
-  
-  def set_iso3_retire(self, value):
-    if not isinstance(value, str):
-      raise LogicError()
-    if len(value) < 1:
-      raise LogicError()
-    self.m_iso3_retire = value
-  
-  def set_iso5(self, value):
-    if not isinstance(value, str):
-      raise LogicError()
-    if len(value) < 1:
-      raise LogicError()
-    self.m_iso5 = value
-  
-  # Get methods
-  #
-  def get_subtag(self):
-    value = self.m_subtag
-    if value is not None:
-      return value
-    else:
-      raise LogicError()
-  
-  def get_iso2(self):
-    value = self.m_iso2
-    if value is not None:
-      return value
-    else:
-      raise LogicError()
-  
-  def get_iso3_code(self):
-    value = self.m_iso3_code
-    if value is not None:
-      return value
-    else:
-      raise LogicError()
-  
-  def get_iso3_name(self):
-    value = self.m_iso3_name
-    if value is not None:
-      return value
-    else:
-      raise LogicError()
-  
-  def get_iso3_macro(self):
-    value = self.m_iso3_macro
-    if value is not None:
-      return value
-    else:
-      raise LogicError()
+    object.__setattr__(self, name, value)
 
-  def get_iso3_retire(self):
-    value = self.m_iso3_retire
-    if value is not None:
-      return value
-    else:
-      raise LogicError()
-  
-  def get_iso5(self):
-    value = self.m_iso5
-    if value is not None:
-      return value
-    else:
-      raise LogicError()
-  
-  # Delete methods
+  # Deleting fields is not allowed
   #
-  def del_subtag(self):
-    raise LogicError()
-    
-  def del_iso2(self):
-    raise LogicError()
-  
-  def del_iso3_code(self):
+  def __delattr__(self, name):
     raise LogicError()
-  
-  def del_iso3_name(self):
-    raise LogicError()
-  
-  def del_iso3_macro(self):
-    raise LogicError()
-  
-  def del_iso3_retire(self):
-    raise LogicError()
-  
-  def del_iso5(self):
-    raise LogicError()
-  
-  # Define properties
+
+  # Function to check whether all the fields have been filled in.
   #
-  subtag_path = property(get_subtag, set_subtag, del_subtag)
-  iso2_path = property(get_iso2, set_iso2, del_iso2)
-  iso3_code_path = property(get_iso3_code, set_iso3_code, del_iso3_code)
-  iso3_name_path = property(get_iso3_name, set_iso3_name, del_iso3_name)
-  iso3_macro_path = property(
-                      get_iso3_macro, set_iso3_macro, del_iso3_macro)
-  iso3_retire_path = property(
-                      get_iso3_retire, set_iso3_retire, del_iso3_retire)
-  iso5_path = property(get_iso5, set_iso5, del_iso5)
-  
+  # Return:
+  #
+  #   True if everything filled in, False otherwise
+  #
+  def completed(self):
+    for n in DataFilePaths._FIELDS:
+      if getattr(self, n) is None:
+        return False
+    return True
+
 #
-# Local functions
+# Local constants
 # ---------------
 #
+# The exceptional language code cases are recorded as frozensets so
+# that each check in the record loops of parse_all() is a single
+# C-level membership test.
+#
 
-# Given a language code from ISO-639-2, check whether it is one of the
-# language codes that does not properly map to ISO-639-3 or ISO-639-5.
+# The language codes from ISO-639-2 that do not properly map to
+# ISO-639-3 or ISO-639-5.
 #
 # This only is the language code "him", which it seems should be in
 # ISO-639-5 as it refers to a collection of languages.
 #
-# The given language code should be the term3 code if present, else the
-# biblio3 code.
-#
-# Parameters:
-#
-#   k : str - the language code from ISO-639-2 to check
+# The language code checked against this set should be the term3 code
+# if present, else the biblio3 code.
 #
-# Return:
-#
-#   True if this is one of the exceptional unmapped codes, False
-#   otherwise
-#
-def fix_iso2_map(k):
-  
-  if not isinstance(k, str):
-    raise LogicError()
-  
-  if (k == 'him'):
-    return True
-  else:
-    return False
+fix_iso2_map = frozenset(('him',))
 
-# Given a language code from ISO-639-2, check whether it is one of the
-# language codes that has a code2 but is in ISO-639-5.
+# The language codes from ISO-639-2 that have a code2 but are in
+# ISO-639-5.
 #
 # This only is the language code "bih" which refers to a language group
 # but has the code2 "bh", which is not recorded in ISO-639-5.
 #
-# The given language code should be the term3 code if present, else the
-# biblio3 code.
-#
-# Parameters:
-#
-#   k : str - the language code from ISO-639-2 to check
-#
-# Return:
-#
-#   True if this is one of the exceptional ISO-639-2 codes with a code2
-#   that is in ISO-639-5, False otherwise
+# The language code checked against this set should be the term3 code
+# if present, else the biblio3 code.
 #
-def special_iso2_code2(k):
-  
-  if not isinstance(k, str):
-    raise LogicError()
-  
-  if (k == 'bih'):
-    return True
-  else:
-    return False
+special_iso2_code2 = frozenset(('bih',))
 
-# Given a language code, check whether it is one of the "extra" language
-# codes.
-#
-# These are the language codes from the exceptional records in the
-# functions fix_iso2_map() and special_iso2_code2(), including alternate
-# forms such as code2.
+# The "extra" language codes.
 #
-# Parameters:
-#
-#   k : str - the language code to check
-#
-# Return:
-#
-#   True if this is one of the extra codes, False otherwise
+# These are the language codes from the exceptional records in the sets
+# fix_iso2_map and special_iso2_code2, including alternate forms such
+# as code2.
 #
-def extra_iso2_code(k):
-  
-  if not isinstance(k, str):
-    raise LogicError()
-  
-  if (k == 'him') or (k == 'bih') or (k == 'bh'):
-    return True
-  else:
-    return False
+extra_iso2_code = frozenset(('him', 'bih', 'bh'))
 
-# Check whether a given language code is an archaic language tag found
-# only in the subtag registry.
+# The archaic language tags found only in the subtag registry.
 #
 # Archaic tags are all two-letter tags, they are not found in the ISO
 # tables, and all of them have mappings to modernized codes that are
 # found in the ISO tables.
 #
-# Parameters:
-#
-#   k : str - the language code to check
-#
-# Return:
-#
-#   True if this is one of the archaic language tags, False otherwise
-#
-def archaic_langtag(k):
-  
-  if not isinstance(k, str):
-    raise LogicError()
-  
-  if (k == 'in') or (k == 'iw') or \
-      (k == 'ji') or (k == 'jw') or (k == 'mo'):
-    return True
-  else:
-    return False
+archaic_langtag = frozenset(('in', 'iw', 'ji', 'jw', 'mo'))
 
-# Check whether a given language code has a "split remapping."
+# The language codes that have a "split remapping."
 #
 # A split remapping occurs when the language code is remapped one way in
 # the subtag registry and a different way in the ISO-639-3 retire table.
@@ -407,23 +226,7 @@ def archaic_langtag(k):
 # ISO-639-3 retire table can't document this kind of mapping, so it
 # remaps to the equivalent three-letter language code instead.
 #
-# Parameters:
-#
-#   k : str - the language code to check
-#
-# Return:
-#
-#   True if this code has a split remapping, False otherwise
-#
-def split_remap(k):
-
-  if not isinstance(k, str):
-    raise LogicError()
-  
-  if k == 'adp':
-    return True
-  else:
-    return False
+split_remap = frozenset(('adp',))
 
 #
 # Public functions
@@ -465,6 +268,13 @@ def parse_all(paths):
       paths.iso3_retire_path)
   iso5.parse(paths.iso5_path)
 
+  # Bind the module-level indices that the verification loops probe on
+  # every iteration to local variables, since a local variable access
+  # is faster than a module attribute lookup
+  iso3_code = iso3.code_code
+  iso3_retire = iso3.code_retire
+  iso5_code = iso5.code
+
   # Every record in the ISO-639-2 database must have an equivalent
   # record either in the ISO-639-3 main code table or ISO-639-5;
   # furthermore, this mapping must always be by the term3 code if given,
@@ -472,59 +282,67 @@ def parse_all(paths):
   # term3 and/or a code2 must be in the ISO-639-3 main code table and
   # have these additional codes registered there; for exceptions, see
   # fix_iso2_map() and special_iso2_code2()
+  #
+  # The existence half of this check is done first in bulk with a
+  # single set difference over the cached key list; only if a key comes
+  # out unmapped is the key list scanned again, to report the first
+  # offender in file order
+  missing = frozenset(iso2.rec_keys) - iso3_code.keys() - \
+      iso5_code.keys() - fix_iso2_map
+  if len(missing) > 0:
+    for k in iso2.rec_keys:
+      if k in missing:
+        raise ISO2MappingError(k)
+
+  # The stricter per-record checks still need to know which upgrade
+  # table each key landed in, so they iterate the records once
   for rr in iso2.rec:
     # Get the record fields
     r = rr[1]
     
-    # Start with key as the biblio3 code, which is present in all
-    # records
-    k = r['biblio3']
-    
-    # If term3 code is present, then use that instead as the key
-    if 'term3' in r:
-      k = r['term3']
+    # The effective key is the term3 code if present, else the biblio3
+    # code; the iso2 module caches this at parse time
+    k = r.key
     
     # If this is one of the exception unmapped records, skip the check
-    if fix_iso2_map(k):
+    if k in fix_iso2_map:
       continue
     
-    # Look for the record in one of the external databases
-    if k in iso3.code_code:
+    # Look for the record in one of the external databases; the main
+    # code table is probed just once with get(), since None means the
+    # key is not there at all
+    ru = iso3_code.get(k)
+    if ru is not None:
       # Found the key in ISO-639-3 main code table -- make sure that the
       # key maps to the code3 column
-      if iso3.code_code[k][1]['code3'] != k:
+      if ru.code3 != k:
         raise ISO2MappingError(k)
-      
-      # Get the ISO-639-3 record
-      ru = iso3.code_code[k][1]
-      
+
       # If the ISO-639-2 record has a code2, the ISO-639-3 record must
-      # have a matching one
-      if 'code2' in r:
-        if 'code2' not in ru:
-          raise ISO2MappingError(k)
-        if r['code2'] != ru['code2']:
+      # have a matching one; a missing field reads as None, which can
+      # never equal the code2 string, so one probe covers both the
+      # presence and the match check
+      if r.code2 is not None:
+        if r.code2 != ru.code2:
           raise ISO2MappingError(k)
-        
+
       # If the term3 code is present in the ISO-639-2 record, make sure
       # that the biblio3 code in ISO-639-2 has a matching biblio3 code
       # in ISO-639-3
-      if 'term3' in r:
-        if 'biblio3' not in ru:
-          raise ISO2MappingError(k)
-        if r['biblio3'] != ru['biblio3']:
+      if r.term3 is not None:
+        if r.biblio3 != ru.biblio3:
           raise ISO2MappingError(k)
-    
-    elif k in iso5.code:
+
+    elif k in iso5_code:
       # Found the key in ISO-639-5 -- must not have a term3 in the
       # record
-      if 'term3' in r:
+      if r.term3 is not None:
         raise ISO2MappingError(k)
-      
+
       # Must not have a code2 in the record, unless it is one of the
       # exceptional records
-      if not special_iso2_code2(k):
-        if 'code2' in r:
+      if k not in special_iso2_code2:
+        if r.code2 is not None:
           raise ISO2MappingError(k)
     
     else:
@@ -533,67 +351,67 @@ def parse_all(paths):
 
   # Every language subtag in the subtag registry must map to a code in
   # either the ISO-639-3 main code table, the ISO-639-3 retire table,
-  # ISO-639-5, extra_iso2_code(), or archaic_langtag(); also, the subtag
+  # ISO-639-5, extra_iso2_code, or archaic_langtag; also, the subtag
   # record for the range of codes qaa..qtz for private use is skipped
-  for rr in subtag.rec:
-    # Get the record fields
-    r = rr[1]
-    
-    # Skip this if not a language record
-    if r['type'] != 'language':
-      continue
-    
-    # Get the subtag
-    sv = r['subtag']
-    
-    # Skip if range of records for private use
-    if (sv == 'qaa..qtz'):
-      continue
-    
-    # Check that it maps correctly
-    if (sv not in iso3.code_code) and \
-        (sv not in iso3.code_retire) and \
-        (sv not in iso5.code) and \
-        (not extra_iso2_code(sv)) and \
-        (not archaic_langtag(sv)):
-      raise SubtagMappingError(sv)
+  #
+  # The valid codes are collected in one set up front so that the loop
+  # performs a single membership test per subtag; none of the
+  # underlying indices mutate after parsing
+  valid_langs = frozenset(iso3_code) | \
+      frozenset(iso3_retire) | \
+      frozenset(iso5_code) | \
+      extra_iso2_code | archaic_langtag
 
   # Every language subtag remapping in the subtag registry must also be
   # present in the ISO-639-3 retire table, except for the mappings of
   # the archaic_langtag() language subtags; also, all remappings must be
   # the same, except for language tags in split_remap()
+  #
+  # Both of these checks filter down to the same language records, so
+  # they share a single pass over the subtag registry
   for rr in subtag.rec:
     # Get the record fields
     r = rr[1]
-    
+
     # Skip this if not a language record
     if r['type'] != 'language':
       continue
-    
-    # Skip this if no preferred value
-    if 'preferred-value' not in r:
+
+    # Get the subtag
+    sv = r['subtag']
+
+    # Check that the subtag maps correctly, except for the range of
+    # records qaa..qtz for private use
+    if sv != 'qaa..qtz':
+      if sv not in valid_langs:
+        raise SubtagMappingError(sv)
+
+    # The rest of this pass checks the remapping, which only applies to
+    # records with a preferred value; read the field just once into a
+    # local since it is needed again below
+    pv = r.get('preferred-value')
+    if pv is None:
       continue
-    
-    # Skip this if archaic language tag
-    if archaic_langtag(r['subtag']):
+
+    # Skip the remapping check for archaic language tags
+    if sv in archaic_langtag:
       continue
-    
-    # Check that language tag is in retire table
-    if r['subtag'] not in iso3.code_retire:
-      raise RemappingError(r['subtag'])
-    
-    # Get the retire table record fields
-    s = iso3.code_retire[r['subtag']][1]
-    
+
+    # Look up the retire table record fields; None means the language
+    # tag is not in the retire table at all
+    s = iso3_retire.get(sv)
+    if s is None:
+      raise RemappingError(sv)
+
     # The mapping field must be present
-    if 'mapping' not in s:
-      raise RemappingError(r['subtag'])
-    
+    if s.mapping is None:
+      raise RemappingError(sv)
+
     # Don't verify that remappings are the same if this is a split
     # remapping
-    if split_remap(r['subtag']):
+    if sv in split_remap:
       continue
-    
+
     # The mapping must be the same
-    if r['preferred-value'] != s['mapping']:
-      raise RemappingError(r['preferred-value'])
+    if pv != s.mapping:
+      raise RemappingError(pv)
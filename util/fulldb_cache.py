@@ -0,0 +1,261 @@
+#
+# fulldb_cache.py
+# ===============
+#
+# Python-3 module for loading the full language tag database through a
+# disk cache.
+#
+# Use the load_or_parse() function with a completed DataFilePaths
+# object from the fulldb module.  On a cache hit, the parsed tables of
+# the subtag, iso2, iso3, and iso5 modules are restored directly from
+# the cache file, skipping both the data file parsing and the
+# interdatabase consistency checks, which were already performed when
+# the cache was written.  Otherwise, the database is loaded normally
+# with fulldb.parse_all() and the cache file is rewritten.
+#
+# The cache is validated against the path, size, and modification time
+# of every data file, so editing or replacing any data file causes the
+# next load to reparse and rewrite the cache.
+#
+# The cache file stores a pickle of the parsed tables, so loading one
+# runs the pickle deserializer over its contents.  The cache directory
+# is under the invoking user's home directory and must not be writable
+# by untrusted users.
+#
+# This makes use of the following imported modules:
+#
+import fulldb
+import hashlib
+import iso2
+import iso3
+import iso5
+import os
+import os.path
+import pickle
+import subtag
+
+#
+# Local constants
+# ---------------
+#
+
+# The directory that the cache files are stored in.
+#
+cache_dir = os.path.join(os.path.expanduser('~'), '.cache', 'langtag')
+
+# The parsed table variables of each database module that are captured
+# in and restored from the cache, as (module, variable name tuple)
+# pairs.
+#
+table_vars = (
+  (subtag, ('rec',)),
+  (iso2, ('rec', 'rec_keys', 'code', 'code_line')),
+  (iso3, ('rec_code', 'code_code', 'code_code_line',
+          'rec_name', 'code_name', 'code_name_line',
+          'rec_macro', 'code_macro', 'code_macro_line',
+          'rec_retire', 'code_retire', 'code_retire_line')),
+  (iso5, ('rec', 'code', 'code_line')))
+
+#
+# Local functions
+# ---------------
+#
+
+# Get the tuple of all seven data file paths from a completed
+# DataFilePaths object.
+#
+# Parameters:
+#
+#   paths : DataFilePaths - the completed object storing all the data
+#   file paths
+#
+# Return:
+#
+#   a tuple of the seven data file paths
+#
+def data_paths(paths):
+  return tuple(
+    getattr(paths, n) for n in fulldb.DataFilePaths._FIELDS)
+
+# Compute the cache validation key for the given data file paths.
+#
+# The key records the path, size, and modification time of each data
+# file, so a cache written from different files or from files that
+# have since changed will not validate.
+#
+# Exceptions from os.stat() pass through to the caller.
+#
+# Parameters:
+#
+#   fpaths : tuple of str - the paths to the seven data files
+#
+# Return:
+#
+#   a tuple usable as the cache validation key
+#
+def cache_key(fpaths):
+
+  key = []
+  for p in fpaths:
+    st = os.stat(p)
+    key.append((p, st.st_size, st.st_mtime_ns))
+  return tuple(key)
+
+# Compute the path of the cache file for the given data file paths.
+#
+# The file name is a hash of the data file paths, so different sets of
+# data files get different cache files, while reparsing the same set
+# of data files rewrites one cache file in place.
+#
+# Parameters:
+#
+#   fpaths : tuple of str - the paths to the seven data files
+#
+# Return:
+#
+#   the path to the cache file
+#
+def cache_file(fpaths):
+
+  h = hashlib.blake2b(digest_size=16)
+  for p in fpaths:
+    h.update(p.encode('utf-8'))
+    h.update(b'\x00')
+  return os.path.join(cache_dir, h.hexdigest() + '.pkl')
+
+# Try to load the parsed tables from the given cache file.
+#
+# If the cache file can be read, unpickled, and its stored key matches
+# the cache validation key of the given data file paths, the table
+# variables of all the database modules are set from the cache and
+# True is returned.  In all other cases False is returned and the
+# caller falls back to a full load.
+#
+# Parameters:
+#
+#   cpath : str - the path to the cache file
+#
+#   fpaths : tuple of str - the paths to the seven data files
+#
+# Return:
+#
+#   True if the tables were loaded from the cache, False otherwise
+#
+def load_cache(cpath, fpaths):
+
+  # Read and unpickle the cache file, treating any failure as a cache
+  # miss; the unpickler can raise nearly anything on corrupt or
+  # truncated data, so the net is deliberately wide
+  try:
+    with open(cpath, 'rb') as fin:
+      obj = pickle.load(fin)
+  except Exception:
+    return False
+
+  # The cache must hold a dictionary whose stored key matches the
+  # current state of the data files
+  if not isinstance(obj, dict):
+    return False
+  try:
+    ck = cache_key(fpaths)
+  except OSError:
+    return False
+  if obj.get('key') != ck:
+    return False
+
+  # The stored tables must be a list matching the table variable
+  # layout
+  tables = obj.get('tables')
+  if not isinstance(tables, list):
+    return False
+  if len(tables) != len(table_vars):
+    return False
+  for tv, vals in zip(table_vars, tables):
+    if not isinstance(vals, list):
+      return False
+    if len(vals) != len(tv[1]):
+      return False
+
+  # Cache is valid, so bind all the table variables from it
+  for tv, vals in zip(table_vars, tables):
+    m = tv[0]
+    for n, v in zip(tv[1], vals):
+      setattr(m, n, v)
+
+  return True
+
+# Write the parsed tables of all the database modules to the given
+# cache file.
+#
+# Failure to write the cache is ignored, since the cache is only an
+# optimization.
+#
+# Parameters:
+#
+#   cpath : str - the path to the cache file
+#
+#   fpaths : tuple of str - the paths to the seven data files
+#
+def save_cache(cpath, fpaths):
+
+  obj = {
+    'key': cache_key(fpaths),
+    'tables': [
+      [getattr(m, n) for n in names] for m, names in table_vars]}
+
+  # Write to a temporary file alongside the cache and rename it into
+  # place, so an interrupted run can never leave a half-written cache
+  # file behind; os.replace() is atomic on the same file system
+  tpath = cpath + '.tmp'
+  try:
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(tpath, 'wb') as fout:
+      pickle.dump(obj, fout, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tpath, cpath)
+  except OSError:
+    try:
+      os.remove(tpath)
+    except OSError:
+      pass
+
+#
+# Public functions
+# ----------------
+#
+
+# Load the full language tag database, through the disk cache if
+# possible.
+#
+# Pass a DataFilePaths object that has been completed with all paths
+# filled in, as for fulldb.parse_all().
+#
+# If a valid cache exists for the given data files, the parsed tables
+# of the subtag, iso2, iso3, and iso5 modules are restored from it and
+# nothing is parsed.  Otherwise the database is loaded and checked
+# with fulldb.parse_all() and the cache is rewritten.
+#
+# Parameters:
+#
+#   paths : DataFilePaths - the completed object storing all the data
+#   file paths
+#
+def load_or_parse(paths):
+
+  # Check parameter
+  if not isinstance(paths, fulldb.DataFilePaths):
+    raise fulldb.LogicError()
+  if not paths.completed():
+    raise fulldb.LogicError()
+
+  # Get the data file paths and the cache file path
+  fpaths = data_paths(paths)
+  cpath = cache_file(fpaths)
+
+  # If the cache validates, load everything from it and skip parsing
+  if load_cache(cpath, fpaths):
+    return
+
+  # Cache miss, so load and check the full database normally and then
+  # rewrite the cache
+  fulldb.parse_all(paths)
+  save_cache(cpath, fpaths)
@@ -20,6 +20,9 @@
 # which is "Reserved for local use"
 #
 
+import mmap
+import re
+
 #
 # Exceptions
 # ----------
@@ -36,49 +39,44 @@ class ISO2Error(Exception):
   def __str__(self):
     return 'Unknown ISO-639-2 parsing error!'
 
-class BadCode(ISO2Error):
+# Shared base class for all the parsing errors that relate to a
+# specific line of the data file.
+#
+# Each specific parsing error is a subclass that only overrides the
+# class-level MSG attribute.  The __init__ and __str__ defined here
+# handle the optional line number for every subclass, so the per-class
+# constructor and formatting boilerplate is written just once.
+#
+class ISO2ParseError(ISO2Error):
+
+  # The message text, overridden by each subclass
+  #
+  MSG = 'Unknown parsing error!'
+
   def __init__(self, line=None):
     self.m_line = line
   def __str__(self):
     if self.m_line is not None:
       return 'ISO-639-2 data line ' + str(self.m_line) + ': ' + \
-        'Invalid language code!'
+        self.MSG
     else:
-      return 'Invalid language code!'
+      return self.MSG
+
+class BadCode(ISO2ParseError):
+  MSG = 'Invalid language code!'
 
 class BadDataFile(ISO2Error):
   def __str__(self):
     return 'ISO-639-2 data file must be the UTF-8 version!'
 
-class BadRecord(ISO2Error):
-  def __init__(self, line=None):
-    self.m_line = line
-  def __str__(self):
-    if self.m_line is not None:
-      return 'ISO-639-2 data line ' + str(self.m_line) + ': ' + \
-        'Invalid record syntax!'
-    else:
-      return 'Invalid record syntax!'
+class BadRecord(ISO2ParseError):
+  MSG = 'Invalid record syntax!'
 
-class DoubleCodeError(ISO2Error):
-  def __init__(self, line=None):
-    self.m_line = line
-  def __str__(self):
-    if self.m_line is not None:
-      return 'ISO-639-2 data line ' + str(self.m_line) + ': ' + \
-        'Record has doubled code!'
-    else:
-      return 'Record has doubled code!'
+class DoubleCodeError(ISO2ParseError):
+  MSG = 'Record has doubled code!'
 
-class FieldMissingError(ISO2Error):
-  def __init__(self, line=None):
-    self.m_line = line
-  def __str__(self):
-    if self.m_line is not None:
-      return 'ISO-639-2 data line ' + str(self.m_line) + ': ' + \
-        'Record missing required field!'
-    else:
-      return 'Record missing required field!'
+class FieldMissingError(ISO2ParseError):
+  MSG = 'Record missing required field!'
 
 class LogicError(ISO2Error):
   def __str__(self):
@@ -93,21 +91,65 @@ class NoDataFileError(ISO2Error):
     else:
       return 'Can\'t find ISO-639-2 data file!'
 
-class RedefineError(ISO2Error):
+class RedefineError(ISO2ParseError):
+  MSG = 'Language code is already defined!'
   def __init__(self, line=None, tname=None):
     self.m_line = line
     self.m_tname = tname
   def __str__(self):
-    if (self.m_line is not None) and (self.m_tname is not None):
-      return 'ISO-639-2 record at line ' + str(self.m_line) + ': ' + \
-        'Language code ' + self.m_tname + ' is already defined!'
-    
-    elif self.m_line is not None:
-      return 'ISO-639-2 record at line ' + str(self.m_line) + ': ' + \
-        'Language code is already defined!'
-      
+    if self.m_tname is not None:
+      msg = 'Language code ' + self.m_tname + ' is already defined!'
     else:
-      return 'Language code is already defined!'
+      msg = self.MSG
+    if self.m_line is not None:
+      return 'ISO-639-2 data line ' + str(self.m_line) + ': ' + msg
+    else:
+      return msg
+
+#
+# Class definitions
+# -----------------
+#
+
+# Class for storing the fields of a single parsed record.
+#
+# The official data file does not have any header line identifying the
+# name of the columns.  The following attributes are defined by this
+# module for sake of identification:
+#
+#   .biblio3 - the three-letter bibliographic language code
+#   .term3   - the three-letter terminologic language code
+#   .code2   - the two-letter language code
+#   .en      - the English name of the language record
+#   .fr      - the French name of the language record
+#
+# The term3 and code2 attributes are optional and are set to None for
+# records that do not provide them.  All other attributes are required
+# and are always strings after parsing.
+#
+# In addition to the fields from the data file, every record caches the
+# effective language code of the record in the key attribute:  the
+# term3 code if present, otherwise the biblio3 code.  Cross-database
+# checks use this key repeatedly, so it is computed just once during
+# parsing.
+#
+# The attributes are stored in __slots__, so each record carries no
+# per-instance dictionary, which makes records much smaller than field
+# dictionaries and turns each field access into a fixed slot lookup.
+#
+class Record:
+
+  __slots__ = ('biblio3', 'term3', 'code2', 'en', 'fr', 'key')
+
+  # Constructor just initializes all attributes to None
+  #
+  def __init__(self):
+    self.biblio3 = None
+    self.term3 = None
+    self.code2 = None
+    self.en = None
+    self.fr = None
+    self.key = None
 
 #
 # Module-level variables
@@ -123,35 +165,42 @@ class RedefineError(ISO2Error):
 #
 # Each record is a tuple with two elements.  The first element is an
 # integer that stores the line number of the first line of the record in
-# the data file.  The second element is a dictionary that maps field
-# names to field values.
+# the data file.  The second element is a Record object storing the
+# field values.  See the Record class for the definitions of the
+# fields.
 #
-# The official data file does not have any header line identifying the
-# name of the columns.  The following field names are defined by this
-# module for sake of identification:
-#
-#   biblio3 - the three-letter bibliographic language code
-#   term3   - the three-letter terminologic language code
-#   code2   - the two-letter language code
-#   en      - the English name of the language record
-#   fr      - the French name of the language record
+rec = None
+
+# The module-level variable that stores a list of the effective
+# language code keys of the parsed records, or None if the file hasn't
+# been parsed yet.
 #
-# The term3 and code2 fields are optional and are not present in all
-# records.  All other fields are required and present in all records.
+# Use the parse() function to set this variable.  Once it is set
+# successfully, it will be a list parallel to rec, where each element
+# is the key attribute of the corresponding record.
 #
-rec = None
+rec_keys = None
 
 # The module-level variable that stores the index of language codes to
 # parsed records, or None if the file hasn't been parsed yet.
 #
 # Use the parse() function to set this variable.  Once it is set
-# successfully, it will be a dictionary with string keys and values that
-# are the same tuple objects used in the rec module-level variable.
+# successfully, it will be a dictionary with string keys and values
+# that are the same Record objects stored in the tuples of the rec
+# module-level variable.
 #
-# Multiple keys may map to the same tuple object.
+# Multiple keys may map to the same record object.
 #
 code = None
 
+# The module-level variable that stores the index of language codes to
+# record line numbers, or None if the file hasn't been parsed yet.
+#
+# This is a dictionary parallel to code that maps the same keys to the
+# line numbers of the records in the data file.
+#
+code_line = None
+
 #
 # Local functions
 # ---------------
@@ -160,62 +209,63 @@ code = None
 # Verify that a given string is a two-letter code with both letters
 # being lowercase ASCII letters.
 #
+# The caller must pass a string; this local function does not check the
+# parameter type.
+#
 # Parameters:
 #
-#   cd : string | mixed - the value to check
+#   cd : string - the value to check
 #
 # Return:
 #
 #   True if valid two-letter code, False otherwise
 #
 def check_code_2(cd):
-  if not isinstance(cd, str):
-    return False
   if len(cd) != 2:
     return False
-  for c in cd:
-    if (ord(c) < ord('a')) or (ord(c) > ord('z')):
-      return False
-  return True
+  if cd.isascii() and cd.isalpha() and cd.islower():
+    return True
+  else:
+    return False
 
 # Verify that a given string is a three-letter code with all letters
 # being lowercase ASCII letters.
 #
+# The caller must pass a string; this local function does not check the
+# parameter type.
+#
 # Parameters:
 #
-#   cd : string | mixed - the value to check
+#   cd : string - the value to check
 #
 # Return:
 #
 #   True if valid three-letter code, False otherwise
 #
 def check_code_3(cd):
-  if not isinstance(cd, str):
-    return False
   if len(cd) != 3:
     return False
-  for c in cd:
-    if (ord(c) < ord('a')) or (ord(c) > ord('z')):
-      return False
-  return True
+  if cd.isascii() and cd.isalpha() and cd.islower():
+    return True
+  else:
+    return False
 
 # Check whether the given language code is one of the private-use
 # language codes.
 #
+# The caller must pass a string; this local function does not check the
+# parameter type.
+#
 # Parameters:
 #
-#   cd : string | mixed - the value to check
+#   cd : string - the value to check
 #
 # Return:
 #
 #   True if a private-use code, False otherwise
 #
 def is_private(cd):
-  
-  # If parameter isn't string, it isn't a private-use code
-  if not isinstance(cd, str):
-    return False
-  
+
   # If code isn't exactly three characters, it isn't private-use
   if len(cd) != 3:
     return False
@@ -230,40 +280,26 @@ def is_private(cd):
   
   # In order to be private use, second character must be in range a-t
   # and third character must be in range a-z
-  if (ord(cd[1]) >= ord('a')) and (ord(cd[1]) <= ord('t')) and \
-      (ord(cd[2]) >= ord('a')) and (ord(cd[2]) <= ord('z')):
+  if ('a' <= cd[1] <= 't') and ('a' <= cd[2] <= 'z'):
     return True
   else:
     return False
 
-# Given a string holding the first line of text in a file, strip a
-# leading UTF-8 Byte Order Mark (BOM) if present.
-#
-# Only use this function on the very first line of the file, as that is
-# the only place a BOM may be present.
-#
-# The return value is the string as-is if there is no BOM.
-#
-# Parameters:
-#
-#   line : string - the first line to process
-#
-# Return:
-#
-#   the first line, with the BOM stripped out if present
-#
-def strip_bom(line):
-  if not isinstance(line, str):
-    raise LogicError()
-  if len(line) < 1:
-    return line
-  if ord(line[0]) == 0xfeff:
-    if len(line) > 1:
-      return line[1:]
-    else:
-      return ''
-  else:
-    return line
+# Compiled regular expression matching a whole well-formed record line.
+#
+# Group 1 is the biblio3 code, group 2 the optional term3 code, group 3
+# the optional code2 code, group 4 the English name, and group 5 the
+# French name.  Groups 2 and 3 are empty strings when the optional
+# fields are absent.  The pattern trims whitespace around each field
+# and enforces the language code formats, so a single C-level match
+# does the work of the per-field validation path.
+#
+rec_pattern = re.compile(
+  '[ \t]*([a-z]{3})[ \t]*\\|'
+  '[ \t]*((?:[a-z]{3})?)[ \t]*\\|'
+  '[ \t]*((?:[a-z]{2})?)[ \t]*\\|'
+  '[ \t]*([^| \t](?:[^|]*[^| \t])?)[ \t]*\\|'
+  '[ \t]*([^| \t](?:[^|]*[^| \t])?)[ \t]*')
 
 #
 # Public functions
@@ -286,7 +322,7 @@ def strip_bom(line):
 #
 def parse(fpath):
 
-  global rec, code
+  global rec, code, code_line, rec_keys
 
   # Ignore call if rec already set
   if rec is not None:
@@ -296,130 +332,185 @@ def parse(fpath):
   if not isinstance(fpath, str):
     rec = None
     code = None
+    code_line = None
+    rec_keys = None
     raise LogicError()
 
   # Clear the records variable to an empty list and set the code
   # dictionary to an empty dictionary
   rec = []
   code = dict()
+  code_line = dict()
+  rec_keys = []
 
-  # Open the input file as a text file in UTF-8 encoding and parse all
-  # the records
+  # Memory-map the whole input file and decode it in bulk as UTF-8,
+  # then parse all the records; the mapping lets the OS page the raw
+  # bytes in directly without an intermediate read buffer, and the
+  # utf-8-sig codec drops a leading UTF-8 Byte Order Mark (BOM) if one
+  # is present; empty files can't be memory-mapped, so those decode an
+  # empty byte string instead
   try:
-    with open(fpath, mode='rt',
-              encoding='utf-8', errors='strict') as fin:
-  
-      # We have the input file open -- read line by line
-      line_num = 0  # Current line number
-      for line in fin:
-        
-        # Update line count
-        line_num = line_num + 1
-        
-        # If this is the first line, remove UTF-8 Byte Order Mark (BOM)
-        # if present
-        if line_num <= 1:
-          line = strip_bom(line)
-        
-        # Trim leading and trailing whitespace and linebreaks
-        line = line.strip(' \t\n')
-        
-        # Filter out blank lines that are empty or contain only spaces,
-        # tabs, and line breaks
-        if len(line) < 1:
-          continue
-        
-        # We have a content line, so parse into fields using the
-        # vertical bar as separator
+    with open(fpath, mode='rb') as fin:
+      raw = b''
+      if fin.seek(0, 2) > 0:
+        with mmap.mmap(
+            fin.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+          raw = mm[:]
+      text = raw.decode('utf-8-sig', errors='strict')
+
+    # Go through the decoded text line by line, collecting the index
+    # pairs in flat lists so the index dictionaries can be built in
+    # single C-level constructions after the loop
+    all_pairs = []   # (language code, record) pairs
+    pair_lines = []  # (language code, line number) pairs
+    line_num = 0     # Current line number
+    for line in text.splitlines():
+
+      # Update line count
+      line_num = line_num + 1
+
+      # Trim leading and trailing whitespace and linebreaks
+      line = line.strip()
+      
+      # Filter out blank lines that are empty or contain only spaces,
+      # tabs, and line breaks
+      if len(line) < 1:
+        continue
+      
+      # Try to parse the content line with the compiled record pattern,
+      # which validates the record shape and the language code formats
+      # and trims every field in one C-level match
+      m = rec_pattern.fullmatch(line)
+      if m is not None:
+        # Fast path -- build the record straight from the match groups
+        r = Record()
+        r.biblio3 = m.group(1)
+        r.en = m.group(4)
+        r.fr = m.group(5)
+
+        # Assign the optional fields only if not empty
+        if len(m.group(2)) > 0:
+          r.term3 = m.group(2)
+        if len(m.group(3)) > 0:
+          r.code2 = m.group(3)
+
+      else:
+        # The pattern didn't match, so take the field-by-field path,
+        # which diagnoses the specific problem and also handles the
+        # special private use range record -- parse into fields using
+        # the vertical bar as separator
         fv = line.split('|')
-        
+
         # Each record should have exactly five fields
         if len(fv) != 5:
           raise BadRecord(line_num)
-        
+
         # Trim each field of leading and trailing whitespace
-        for i in range(0, len(fv)):
-          fv[i] = fv[i].strip(' \t')
-        
+        fv = [f.strip() for f in fv]
+
         # Make sure the required fields are not empty
         if (len(fv[0]) < 1) or \
             (len(fv[3]) < 1) or \
             (len(fv[4]) < 1):
           raise FieldMissingError(line_num)
-        
+
         # Create a new record and assign the required fields
-        r = dict()
-        r['biblio3'] = fv[0]
-        r['en'] = fv[3]
-        r['fr'] = fv[4]
-        
+        r = Record()
+        r.biblio3 = fv[0]
+        r.en = fv[3]
+        r.fr = fv[4]
+
         # Assign the optional fields only if not empty
         if len(fv[1]) > 0:
-          r['term3'] = fv[1]
+          r.term3 = fv[1]
         if len(fv[2]) > 0:
-          r['code2'] = fv[2]
-        
+          r.code2 = fv[2]
+
         # If this is the reserved range, skip this record
-        if r['biblio3'] == 'qaa-qtz':
+        if r.biblio3 == 'qaa-qtz':
           continue
-        
+
         # Check the language code formats
-        if not check_code_3(r['biblio3']):
+        if not check_code_3(r.biblio3):
           raise BadCode(line_num)
-        if 'term3' in r:
-          if not check_code_3(r['term3']):
+        if r.term3 is not None:
+          if not check_code_3(r.term3):
             raise BadCode(line_num)
-        if 'code2' in r:
-          if not check_code_2(r['code2']):
+        if r.code2 is not None:
+          if not check_code_2(r.code2):
             raise BadCode(line_num)
-        
-        # Make sure that if term3 is given, it isn't equal to biblio3
-        if 'term3' in r:
-          if r['biblio3'] == r['term3']:
-            raise DoubleCodeError(line_num)
-        
-        # Make sure that none of the language codes are in the index yet
-        # and that they aren't in reserved private range
-        if r['biblio3'] in code:
-          raise RedefineError(line_num, r['biblio3'])
-        if is_private(r['biblio3']):
-          raise RedefineError(line_num, r['biblio3'])
-        if 'term3' in r:
-          if r['term3'] in code:
-            raise RedefineError(line_num, r['term3'])
-          if is_private(r['term3']):
-            raise RedefineError(line_num, r['term3'])
-        if 'code2' in r:
-          if r['code2'] in code:
-            raise RedefineError(line_num, r['code2'])
-  
-        # Define the tuple pair of the line number and the record
-        pr = (line_num, r)
-        
-        # Add the tuple to the parsed variables
-        rec.append(pr)
-        code[r['biblio3']] = pr
-        if 'term3' in r:
-          code[r['term3']] = pr
-        if 'code2' in r:
-          code[r['code2']] = pr
-  
+
+      # Cache the effective language code key, which is the term3 code
+      # if present and otherwise the biblio3 code
+      if r.term3 is not None:
+        r.key = r.term3
+      else:
+        r.key = r.biblio3
+
+      # Make sure that if term3 is given, it isn't equal to biblio3
+      if r.term3 is not None:
+        if r.biblio3 == r.term3:
+          raise DoubleCodeError(line_num)
+
+      # Make sure that none of the language codes are in the reserved
+      # private range; redefined codes are detected after the loop when
+      # the index is built
+      if is_private(r.biblio3):
+        raise RedefineError(line_num, r.biblio3)
+      if r.term3 is not None:
+        if is_private(r.term3):
+          raise RedefineError(line_num, r.term3)
+
+      # Add the record to the parsed variables and collect the index
+      # pairs
+      rec.append((line_num, r))
+      rec_keys.append(r.key)
+      all_pairs.append((r.biblio3, r))
+      pair_lines.append((r.biblio3, line_num))
+      if r.term3 is not None:
+        all_pairs.append((r.term3, r))
+        pair_lines.append((r.term3, line_num))
+      if r.code2 is not None:
+        all_pairs.append((r.code2, r))
+        pair_lines.append((r.code2, line_num))
+
+    # Build the index dictionaries in one shot from the collected
+    # pairs; if any language code was defined more than once, the
+    # dictionary will come out smaller than the pair list, in which
+    # case scan the pairs to find and report the offending code
+    code = dict(all_pairs)
+    code_line = dict(pair_lines)
+    if len(code) != len(all_pairs):
+      seen = set()
+      for k, ln in pair_lines:
+        if k in seen:
+          raise RedefineError(ln, k)
+        seen.add(k)
+
   except FileNotFoundError:
     rec = None
     code = None
+    code_line = None
+    rec_keys = None
     raise NoDataFileError(fpath)
   
   except ValueError:
     rec = None
     code = None
+    code_line = None
+    rec_keys = None
     raise BadDataFile()
     
   except ISO2Error as se:
     rec = None
     code = None
+    code_line = None
+    rec_keys = None
     raise se
   
   except Exception as exc:
     rec = None
     code = None
+    code_line = None
+    rec_keys = None
     raise ISO2Error() from exc
@@ -40,6 +40,13 @@
 # variables section for further information.
 #
 
+import collections
+import csv
+import mmap
+import os
+import pickle
+import sys
+
 #
 # Exceptions
 # ----------
@@ -255,6 +262,100 @@ class UnretiredError(ISO3Error):
     return ex_msg_prefix(self.m_df, self.m_line, self.m_val) + \
       'Retired language code is also in main code table!'
 
+#
+# Class definitions
+# -----------------
+#
+
+# Class for storing the fields of a single parsed record from the main
+# code table.
+#
+# See the code table documentation in the module-level variables
+# section for the meaning of the fields.  The optional biblio3, term3,
+# code2, and comment attributes are None for records that do not
+# provide them; all other attributes are always strings after parsing.
+#
+# The attributes are stored in __slots__, so each row carries no
+# per-instance dictionary, which makes the parsed table much smaller
+# than one dictionary per row and turns each field access into a fixed
+# slot lookup.
+#
+# In addition to the table fields, every row class has a line attribute
+# holding the line number of the record in the data file, so records
+# can be stored and passed around bare without a wrapping (line number,
+# record) pair.
+#
+class CodeRow:
+
+  __slots__ = ('line', 'code3', 'biblio3', 'term3', 'code2', 'scope',
+               'ltype', 'name', 'comment')
+
+  # Constructor just initializes all attributes to None
+  #
+  def __init__(self):
+    for n in CodeRow.__slots__:
+      setattr(self, n, None)
+
+# Class for storing the fields of a single parsed record from the
+# retire table.
+#
+# See the retire table documentation in the module-level variables
+# section for the meaning of the fields.  The optional mapping and
+# comment attributes are None for records that do not provide them;
+# all other attributes are always strings after parsing.
+#
+# As with CodeRow, the attributes are stored in __slots__.
+#
+class RetireRow:
+
+  __slots__ = ('line', 'code3', 'name', 'reason', 'mapping', 'comment',
+               'date')
+
+  # Constructor just initializes all attributes to None
+  #
+  def __init__(self):
+    for n in RetireRow.__slots__:
+      setattr(self, n, None)
+
+# Class for storing the fields of a single parsed record from the name
+# table.
+#
+# See the name table documentation in the module-level variables
+# section for the meaning of the fields.  All attributes are required
+# and are always strings after parsing.
+#
+# As with CodeRow, the attributes are stored in __slots__.
+#
+class NameRow:
+
+  __slots__ = ('line', 'code3', 'name', 'iname')
+
+  # Constructor just initializes all attributes to None
+  #
+  def __init__(self):
+    for n in NameRow.__slots__:
+      setattr(self, n, None)
+
+# Class for storing the fields of a single parsed record from the
+# macro table.
+#
+# See the macro table documentation in the module-level variables
+# section for the meaning of the fields.  All attributes are required;
+# the macro3 and code3 attributes are strings after parsing while the
+# active attribute is converted to a boolean.
+#
+# As with CodeRow, the attributes are stored in __slots__.
+#
+class MacroRow:
+
+  __slots__ = ('line', 'macro3', 'code3', 'active')
+
+  # Constructor just initializes all attributes to None
+  #
+  def __init__(self):
+    for n in MacroRow.__slots__:
+      setattr(self, n, None)
+
 #
 # Module-level variables
 # ----------------------
@@ -268,16 +369,26 @@ class UnretiredError(ISO3Error):
 # to identify which table it is for.
 #
 # The rec_ variables are lists of records.  The code_ variables are
-# dictionaries that map language code strings to records within the
-# table.  Multiple language codes may map to the same record in the code
-# table.  In the macro table, the language code maps to the unique
-# language entry.  The macrolanguage codes are *not* included in the
-# index for the macro table -- only the individual language codes are.
-# For the retire table each language code maps to a unique record.
+# dictionaries that map language code strings directly to the records
+# within the table.  Records are row objects -- CodeRow, NameRow,
+# MacroRow, and RetireRow, matching the table -- with the fields
+# stored as attributes.  Multiple language codes may map
+# to the same record in the code table.  In the macro table, the
+# language code maps to the unique language entry.  The macrolanguage
+# codes are *not* included in the index for the macro table -- only the
+# individual language codes are.  For the retire table each language
+# code maps to a unique record.
+#
+# There is also a code_ variable with a _line suffix for each table,
+# which is a parallel dictionary that maps the same language code keys
+# to the line numbers of the records in the data file.  Keeping the
+# line numbers out of the main indices means that hot-path consistency
+# checks reach record fields with a single subscript.
 #
 # The name table index is different because a single language code can
-# have multiple names.  Therefore the values in code_name are lists of
-# records rather than individual records as in the other tables.
+# have multiple names.  Therefore the values in code_name and
+# code_name_line are lists rather than individual entries as in the
+# other tables.
 # 
 # The values of these module-level variables are set to None initially.
 # Use the parse() function to parse all the data files and set these
@@ -287,7 +398,7 @@ class UnretiredError(ISO3Error):
 # gives the official column names that are used in the data files, the
 # field names that these map to in the parsed records below, and whether
 # the field is required or optional.  If optional, then when not present
-# the field will be absent from the record dictionary.
+# the field will be set to None in the row object.
 #
 
 # The code table mapping of official columns to field names:
@@ -332,6 +443,7 @@ class UnretiredError(ISO3Error):
 #
 rec_code = None
 code_code = None
+code_code_line = None
 
 # The name table mapping of official columns to field names:
 #
@@ -355,6 +467,7 @@ code_code = None
 #
 rec_name = None
 code_name = None
+code_name_line = None
 
 # The macro table mapping of official columns to field names:
 #
@@ -377,6 +490,7 @@ code_name = None
 #
 rec_macro = None
 code_macro = None
+code_macro_line = None
 
 # The retire table mapping of official columns to field names:
 #
@@ -414,6 +528,23 @@ code_macro = None
 #
 rec_retire = None
 code_retire = None
+code_retire_line = None
+
+# Optional path to a parse cache file.
+#
+# This is None by default, in which case parse() always reads and
+# validates the data files.  If the client sets this to a file path
+# before calling parse(), then parse() will try to load the parsed
+# tables from that file instead of parsing, provided that the cache was
+# written from data files with the same paths, sizes, and modification
+# times.  After a successful parse from the data files, parse() will
+# rewrite the cache file.
+#
+# The cache file stores a pickle of the parsed tables, so loading one
+# runs the pickle deserializer over its contents.  Only set this to a
+# path that untrusted users can not write to.
+#
+cache_path = None
 
 #
 # Local functions
@@ -436,10 +567,10 @@ def check_code_2(cd):
     return False
   if len(cd) != 2:
     return False
-  for c in cd:
-    if (ord(c) < ord('a')) or (ord(c) > ord('z')):
-      return False
-  return True
+  if cd.isascii() and cd.isalpha() and cd.islower():
+    return True
+  else:
+    return False
 
 # Verify that a given string is a three-letter code with all letters
 # being lowercase ASCII letters.
@@ -457,10 +588,21 @@ def check_code_3(cd):
     return False
   if len(cd) != 3:
     return False
-  for c in cd:
-    if (ord(c) < ord('a')) or (ord(c) > ord('z')):
-      return False
-  return True
+  if cd.isascii() and cd.isalpha() and cd.islower():
+    return True
+  else:
+    return False
+
+# The complete set of private-use language codes.
+#
+# The private-use range is qaa through qtz, which is only 520 codes in
+# total, so the full set is precomputed here once at import time and
+# the is_private check becomes a single hash lookup.
+#
+private_codes = frozenset(
+  'q' + a + b
+  for a in 'abcdefghijklmnopqrst'
+  for b in 'abcdefghijklmnopqrstuvwxyz')
 
 # Check whether the given language code is one of the private-use
 # language codes.
@@ -474,66 +616,116 @@ def check_code_3(cd):
 #   True if a private-use code, False otherwise
 #
 def is_private(cd):
-  
+
   # If parameter isn't string, it isn't a private-use code
   if not isinstance(cd, str):
     return False
-  
-  # If code isn't exactly three characters, it isn't private-use
-  if len(cd) != 3:
-    return False
-  
+
   # Language code matching is case-insensitive, so make the given
-  # language code lowercase
-  cd = cd.lower()
-  
-  # If first letter of language code isn't q, then it isn't private-use
-  if cd[0] != 'q':
-    return False
-  
-  # In order to be private use, second character must be in range a-t
-  # and third character must be in range a-z
-  if (ord(cd[1]) >= ord('a')) and (ord(cd[1]) <= ord('t')) and \
-      (ord(cd[2]) >= ord('a')) and (ord(cd[2]) <= ord('z')):
+  # language code lowercase and test it against the precomputed set;
+  # strings that aren't three lowercase letters starting with q are
+  # never in the set
+  if cd.lower() in private_codes:
     return True
   else:
     return False
 
-# Given a string holding the first line of text in a file, strip a
-# leading UTF-8 Byte Order Mark (BOM) if present.
+# Read one of the data files completely into memory and decode it to a
+# string.
 #
-# Only use this function on the very first line of the file, as that is
-# the only place a BOM may be present.
+# The file is mapped into memory so that the contents arrive in a
+# single read instead of many buffered reads, and the whole file is
+# decoded with one decoder call instead of one per line.  Decoding
+# uses the utf-8-sig codec, which also removes a leading UTF-8 Byte
+# Order Mark (BOM) if present.
 #
-# The return value is the string as-is if there is no BOM.
+# An empty file cannot be mapped, so it is returned as an empty
+# string.
 #
 # Parameters:
 #
-#   line : string - the first line to process
+#   fpath : string or path-like object - the path to the data file
 #
 # Return:
 #
-#   the first line, with the BOM stripped out if present
+#   the decoded contents of the file
 #
-def strip_bom(line):
-  if not isinstance(line, str):
+def read_data_file(fpath):
+  try:
+    fpath = os.fspath(fpath)
+  except TypeError:
     raise LogicError()
-  if len(line) < 1:
-    return line
-  if ord(line[0]) == 0xfeff:
-    if len(line) > 1:
-      return line[1:]
-    else:
-      return ''
-  else:
-    return line
+  with open(fpath, 'rb') as fin:
+    raw = b''
+    if fin.seek(0, 2) > 0:
+      with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        raw = mm[:]
+  return raw.decode('utf-8-sig')
+
+# Correction handlers for the individual erroneous records in the
+# retire table.
+#
+# Each handler takes the parsed record and returns True if processing
+# can continue with the (possibly modified) record, or False if the
+# record should be skipped entirely.  See fix_retire() for further
+# information.
+#
+
+def fix_retire_chs(r):
+  # The chs "Chumash" record is incomplete in the official data file,
+  # lacking a reason code -- only proceed with correction if this is
+  # still the case, otherwise the data has been updated so do not
+  # correct
+  if r.reason is None:
+    # Record is still missing a reason code and is thus erroneous;
+    # this "Chumash" is a language family rather than a language, and
+    # the codes for the individual languages are found in the main
+    # table, so it should be safe to drop the record entirely
+    return False
+  return True
+
+def fix_retire_lcq(r):
+  # There is an erroneous record mapping lcq to ppr, when the proper
+  # mapping of ppr to lcq is already in the retirement table; check
+  # that this erroneous record hasn't been updated by making sure there
+  # is a mapping to 'ppr'
+  if r.mapping == 'ppr':
+    # Drop this erroneous mapping
+    return False
+  return True
+
+def fix_retire_ymt(r):
+  # There is an erroneous mapping of ymt to itself; if this is still
+  # the case, fix it to map to mtm instead, which is the correct value
+  # determined from the IANA subtag registry
+  if r.mapping == 'ymt':
+    r.mapping = 'mtm'
+  return True
+
+def fix_retire_guv(r):
+  # There is an erroneous mapping of guv to itself; if this is still
+  # the case, fix it to map to duz instead, which is the correct value
+  # determined from the IANA subtag registry
+  if r.mapping == 'guv':
+    r.mapping = 'duz'
+  return True
+
+# Dispatch table mapping the language codes of the known erroneous
+# records to their correction handlers, so the common case of a record
+# that needs no correction is a single failed dictionary lookup.
+#
+retire_fixes = {
+  'chs': fix_retire_chs,
+  'lcq': fix_retire_lcq,
+  'ymt': fix_retire_ymt,
+  'guv': fix_retire_guv}
 
 # Given a parsed record from the retire table that hasn't been checked
 # yet, perform corrections on the record.
 #
 # This function is necessary because some of the records in the official
 # table have errors in them.  This function will fix these erroneous
-# records.
+# records by dispatching to the handler registered in retire_fixes.
 #
 # If the function returns False, then the record is a complete error and
 # it should be skipped and not added to the parsed results.  If the
@@ -543,7 +735,7 @@ def strip_bom(line):
 #
 # Parameters:
 #
-#   r : dict - the parsed record mapping of field names to field values
+#   r : RetireRow - the parsed record row object
 #
 # Return:
 #
@@ -551,61 +743,257 @@ def strip_bom(line):
 #   False if the record should be skipped entirely
 #
 def fix_retire(r):
-  
+
   # Check parameter
-  if not isinstance(r, dict):
+  if not isinstance(r, RetireRow):
     raise LogicError()
-  
-  # Only process if there is a code3 field; else just return True
-  # because we can't look up any fixes
-  if 'code3' not in r:
+
+  # Use the code3 field to look up any corrections; if there is no
+  # code3 field or no correction registered for the code, just return
+  # True because there is nothing to fix
+  fn = retire_fixes.get(r.code3)
+  if fn is None:
     return True
-  
-  # Use the code3 field to look up any corrections, else return True if
-  # we don't have any corrections
-  c = r['code3']
-  if (c == 'chs'):
-    # The chs "Chumash" record is incomplete in the official data file,
-    # lacking a reason code -- only proceed with correction if this is
-    # still the case, otherwise the data has been updated so do not
-    # correct
-    if 'reason' not in r:
-      # Record is still missing a reason code and is thus erroneous;
-      # this "Chumash" is a language family rather than a language, and
-      # the codes for the individual languages are found in the main
-      # table, so it should be safe to drop the record entirely
-      return False
-    
-  elif (c == 'lcq'):
-    # There is an erroneous record mapping lcq to ppr, when the proper
-    # mapping of ppr to lcq is already in the retirement table; check
-    # that this erroneous record hasn't been updated by making sure
-    # there is a mapping to 'ppr'
-    if 'mapping' in r:
-      if r['mapping'] == 'ppr':
-        # Drop this erroneous mapping
-        return False
-    
-  elif (c == 'ymt'):
-    # There is an erroneous mapping of ymt to itself; if this is still
-    # the case, fix it to map to mtm instead, which is the correct value
-    # determined from the IANA subtag registry
-    if 'mapping' in r:
-      if r['mapping'] == 'ymt':
-        r['mapping'] = 'mtm'
-        return True
-    
-  elif (c == 'guv'):
-    # There is an erroneous mapping of guv to itself; if this is still
-    # the case, fix it to map to duz instead, which is the correct value
-    # determined from the IANA subtag registry
-    if 'mapping' in r:
-      if r['mapping'] == 'guv':
-        r['mapping'] = 'duz'
-        return True
-    
-  # If we got here, no known corrections needed
-  return True
+  return fn(r)
+
+# Mapping of the recognized column names in the main code table header
+# (lowercased) to the standard field names used in parsed records.
+#
+# Every recognized column is also required, so the set of required
+# standard field names is just the set of values of this mapping.
+#
+code_colmap = {
+  'id': 'code3',
+  'part2b': 'biblio3',
+  'part2t': 'term3',
+  'part1': 'code2',
+  'scope': 'scope',
+  'language_type': 'ltype',
+  'ref_name': 'name',
+  'comment': 'comment'}
+
+code_required = frozenset(code_colmap.values())
+
+# Mapping of the recognized column names in the retirements table
+# header (lowercased) to the standard field names used in parsed
+# records, along with the set of required standard field names.
+#
+retire_colmap = {
+  'id': 'code3',
+  'ref_name': 'name',
+  'ret_reason': 'reason',
+  'change_to': 'mapping',
+  'ret_remedy': 'comment',
+  'effective': 'date'}
+
+retire_required = frozenset(retire_colmap.values())
+
+# Mapping of the recognized column names in the name table header
+# (lowercased) to the standard field names used in parsed records,
+# along with the set of required standard field names.
+#
+name_colmap = {
+  'id': 'code3',
+  'print_name': 'name',
+  'inverted_name': 'iname'}
+
+name_required = frozenset(name_colmap.values())
+
+# Mapping of the recognized column names in the macrolanguage table
+# header (lowercased) to the standard field names used in parsed
+# records, along with the set of required standard field names.
+#
+macro_colmap = {
+  'm_id': 'macro3',
+  'i_id': 'code3',
+  'i_status': 'active'}
+
+macro_required = frozenset(macro_colmap.values())
+
+# Given the tokenized header row of one of the data tables, build the
+# precomputed (field name, column index) pairs used for per-line field
+# extraction.
+#
+# All four table parsers share this logic: the column names are
+# trimmed and lowercased, each recognized column name is renamed to
+# its standard field name with a single lookup in the given column
+# mapping, duplicate and missing columns raise BadHeader, and the
+# resulting field-to-column mapping is frozen into a tuple of pairs so
+# the extraction loops don't probe a dictionary for every field.
+#
+# Parameters:
+#
+#   cn : list of str - the tokenized column names from the first line
+#   of the file, with the BOM already stripped from the first column;
+#   the given list is not modified
+#
+#   tname : str - the table name to report in exceptions
+#
+#   colmap : dict - mapping of recognized column names (lowercased) to
+#   standard field names
+#
+#   required : frozenset - the standard field names that must all be
+#   found in the header
+#
+#   min_cols : int - the minimum number of columns the header must
+#   have
+#
+# Return:
+#
+#   a tuple of (field name, column index) pairs
+#
+def parse_header(cn, tname, colmap, required, min_cols):
+
+  # Should have the minimum number of columns
+  if len(cn) < min_cols:
+    raise BadHeader(tname)
+
+  # Trim all column names and make them lowercase, with a list
+  # comprehension so the loop machinery runs in C instead of indexed
+  # assignments in the interpreter
+  cn = [c.strip().lower() for c in cn]
+
+  # Build the field-to-column mapping, renaming each recognized column
+  # name to its standard field name with a single table lookup;
+  # enumerate() provides the column index without indexed reads
+  fmap = dict()
+  for i, c in enumerate(cn):
+    # Map current column name to its standard field name, or skip this
+    # column if it isn't one of the recognized column names
+    n = colmap.get(c)
+    if n is None:
+      continue
+
+    # Make sure name not already mapped
+    if n in fmap:
+      raise BadHeader(tname)
+
+    # Store name to column index mapping
+    fmap[n] = i
+
+  # Make sure we found all the required columns
+  if not required.issubset(fmap.keys()):
+    raise BadHeader(tname)
+
+  # Freeze the mapping into the extraction pairs
+  return tuple(fmap.items())
+
+# Generator that iterates the parsed rows of one of the data tables.
+#
+# This generator handles everything the four table parsers have in
+# common: the file is read and decoded in one shot, the rows are
+# tokenized with the C-implemented csv module, the header row is
+# turned into extraction pairs with parse_header(), blank rows are
+# filtered out, the fields are trimmed, and each content row is loaded
+# into a new row object created by calling row_factory.  A leading BOM
+# never reaches the header because read_data_file() decodes with the
+# utf-8-sig codec.
+#
+# The caller receives the row objects, with the line attribute of each
+# set to its line number in the data file, and performs the
+# table-specific validation on them.  Fields that are absent from a
+# row keep the None default set by the row object constructor.
+#
+# Parameters:
+#
+#   fpath : string or path-like object - the path to the data file
+#
+#   tname : str - the table name to report in exceptions
+#
+#   colmap : dict - mapping of recognized column names (lowercased) to
+#   standard field names, as for parse_header()
+#
+#   required : frozenset - the standard field names that must all be
+#   found in the header, as for parse_header()
+#
+#   min_cols : int - the minimum number of columns the header must
+#   have, as for parse_header()
+#
+#   row_factory : callable - invoked with no arguments to create a new
+#   empty row object for each content row
+#
+# Return:
+#
+#   a generator yielding row objects with the line attribute filled in
+#
+def iter_rows(fpath, tname, colmap, required, min_cols, row_factory):
+
+  # Read and decode the whole file in one shot
+  data = read_data_file(fpath)
+
+  # Tokenize the rows with the C-implemented csv module, using the
+  # horizontal tab as separator; the data files never quote fields
+  reader = csv.reader(
+      data.splitlines(), delimiter='\t', quoting=csv.QUOTE_NONE)
+
+  fields = None  # Precomputed (field name, column index) pairs
+  for fv in reader:
+
+    # Get the line number of this row from the reader
+    line_num = reader.line_num
+
+    # If this is the first line, set up the extraction pairs from the
+    # header row and skip rest of processing
+    if line_num <= 1:
+      fields = parse_header(fv, tname, colmap, required, min_cols)
+      continue
+
+    # Filter out blank lines that are empty or contain only spaces
+    # and tabs; a line of tabs tokenizes to several empty fields, so
+    # the line is blank whenever every field strips to nothing
+    if not any(f.strip() for f in fv):
+      continue
+
+    # Trim each field of leading and trailing whitespace with a list
+    # comprehension, which runs the loop machinery in C instead of
+    # indexed assignments in the interpreter; strip() returns the
+    # string unchanged for the common clean field, so no copy is made
+    # for those
+    fv = [f.strip() for f in fv]
+
+    # Create a new row object and assign all the fields that are
+    # present, iterating the precomputed (field name, column index)
+    # pairs
+    nfv = len(fv)
+    r = row_factory()
+    r.line = line_num
+    for fnm, fi in fields:
+      if fi < nfv:
+        v = fv[fi]
+        if len(v) > 0:
+          setattr(r, fnm, v)
+
+    # Hand the row to the caller for validation
+    yield r
+
+# The sets of valid single-letter values for the scope and language
+# type fields in the main code table and for the reason field in the
+# retirements table, so that each check is one set membership test.
+#
+scope_codes = frozenset('IMS')
+ltype_codes = frozenset('ACEHLS')
+retire_reasons = frozenset('CDNSM')
+
+# The subset of retirement reason codes that require a mapping field,
+# and the mapping of valid macro table status values to the boolean
+# active flag, so these checks are one membership test or table lookup
+# instead of a chain of string comparisons.
+#
+mapping_reasons = frozenset('CDM')
+active_codes = {'A': True, 'R': False}
+
+# Canonical singleton strings for the enumerated fields, mapping each
+# valid value to itself.
+#
+# Tokenization produces a fresh string object for every field of every
+# row, so after a field has been validated it is replaced with the
+# canonical copy from these mappings.  All records then share one
+# string object per distinct value, and equality comparisons against
+# the field can short-circuit on an identity check.
+#
+scope_intern = dict((c, c) for c in scope_codes)
+ltype_intern = dict((c, c) for c in ltype_codes)
+reason_intern = dict((c, c) for c in retire_reasons)
 
 # Parse the code table from the given ISO-639-3 data file that stores
 # the main code table and store the parsed result in the module-level
@@ -619,214 +1007,148 @@ def fix_retire(r):
 #
 # Parameters:
 #
-#   fpath : string - the path to the data file
+#   fpath : string or path-like object - the path to the data file
 #
 def parse_code(fpath):
 
-  global rec_code, code_code
+  global rec_code, code_code, code_code_line
   
-  # Check parameter
-  if not isinstance(fpath, str):
-    raise LogicError()
-
   # Clear the records variable to an empty list and set the code
   # dictionary to an empty dictionary
   rec_code = []
   code_code = dict()
+  code_code_line = dict()
 
-  # Open the input file as a text file in UTF-8 encoding and parse all
-  # the records
-  with open(fpath, mode='rt',
-            encoding='utf-8', errors='strict') as fin:
+  # Bind the record list to a local variable so the per-row loop
+  # resolves it with fast local lookups instead of module attribute
+  # lookups; mutation is in place, so the module-level variable stays
+  # in sync
+  rec_local = rec_code
 
-    # We have the input file open -- read line by line
-    line_num = 0  # Current line number
-    fmap = None   # Mapping of fields to column indices
-    for line in fin:
-      
-      # Update line count
-      line_num = line_num + 1
-      
-      # If this is the first line, remove UTF-8 Byte Order Mark (BOM)
-      # if present
-      if line_num <= 1:
-        line = strip_bom(line)
-      
-      # Trim trailing whitespace and linebreaks
-      line = line.rstrip(' \t\n')
-      
-      # If this is the first line, set up fmap and skip rest of
-      # processing
-      if line_num <= 1:
-        
-        # Parse into columns
-        cn = line.split('\t')
-        
-        # Should be at least eight columns
-        if len(cn) < 8:
-          raise BadHeader('code')
-          
-        # Trim all column names and make them lowercase
-        for x in range(0, len(cn)):
-          cn[x] = cn[x].strip(' \t').lower()
-        
-        # Set fmap variable
-        fmap = dict()
-        for i in range(0, len(cn)):
-          # Get current column name
-          n = cn[i]
-          
-          # Only process this column if one of the recognized column
-          # names (in lowercase)
-          if (n == 'id') or (n == 'part2b') or (n == 'part2t') or \
-              (n == 'part1') or (n == 'scope') or \
-              (n == 'language_type') or (n == 'ref_name') or \
-              (n == 'comment'):
-            
-            # Map name to standard dictionary name
-            if (n == 'id'):
-              n = 'code3'
-            elif (n == 'part2b'):
-              n = 'biblio3'
-            elif (n == 'part2t'):
-              n = 'term3'
-            elif (n == 'part1'):
-              n = 'code2'
-            elif (n == 'scope'):
-              n = 'scope'
-            elif (n == 'language_type'):
-              n = 'ltype'
-            elif (n == 'ref_name'):
-              n = 'name'
-            elif (n == 'comment'):
-              n = 'comment'
-            else:
-              raise LogicError()
-            
-            # Make sure name not already mapped
-            if n in fmap:
-              raise BadHeader('code')
-            
-            # Store name to column index mapping
-            fmap[n] = i
-        
-        # Make sure we found all the required columns
-        if ('code3' not in fmap) or ('biblio3' not in fmap) or \
-            ('term3' not in fmap) or ('code2' not in fmap) or \
-            ('scope' not in fmap) or ('ltype' not in fmap) or \
-            ('name' not in fmap) or ('comment' not in fmap):
-          raise BadHeader('code')
-        
-        # Skip rest of processing
-        continue
-      
-      # Filter out blank lines that are empty or contain only spaces,
-      # tabs, and line breaks
-      if len(line) < 1:
-        continue
-      
-      # We have a content line, so parse into fields using the
-      # horizontal tab as separator
-      fv = line.split('\t')
-      
-      # Trim each field of leading and trailing whitespace
-      for i in range(0, len(fv)):
-        fv[i] = fv[i].strip(' \t')
-      
-      # Create a new record and assign all the fields that are present
-      r = dict()
-      for fnm in fmap:
-        if len(fv) > fmap[fnm]:
-          if len(fv[fmap[fnm]]) > 0:
-            r[fnm] = fv[fmap[fnm]]
-      
-      # Make sure the required fields are present
-      if 'code3' not in r:
-        raise FieldMissingError('code', line_num, 'code3')
-      if 'scope' not in r:
-        raise FieldMissingError('code', line_num, 'scope')
-      if 'ltype' not in r:
-        raise FieldMissingError('code', line_num, 'ltype')
-      if 'name' not in r:
-        raise FieldMissingError('code', line_num, 'name')
-      
-      # Check the raw format of the language codes
-      if not check_code_3(r['code3']):
-        raise BadCode('code', line_num, r['code3'])
-      
-      if 'biblio3' in r:
-        if not check_code_3(r['biblio3']):
-          raise BadCode('code', line_num, r['biblio3'])
-      
-      if 'term3' in r:
-        if not check_code_3(r['term3']):
-          raise BadCode('code', line_num, r['term3'])
-      
-      if 'code2' in r:
-        if not check_code_2(r['code2']):
-          raise BadCode('code', line_num, r['code2'])
-      
-      # If the term3 code is present, it must be equal to the main code
-      if 'term3' in r:
-        if r['term3'] != r['code3']:
-          raise ISOSyncError('code', line_num, r['term3'])
-      
-      # For better consistency with ISO-639-2, remove the biblio3 code
-      # if it is the same as the term3 code
-      if ('biblio3' in r) and ('term3' in r):
-        if r['biblio3'] == r['term3']:
-          del r['biblio3']
-      
-      # If biblio3 is still present, term3 must also be present
-      if 'biblio3' in r:
-        if 'term3' not in r:
-          raise ISOMissingError('code', line_num, r['biblio3'])
-      
-      # Check the scope field
-      s = r['scope']
-      if (s != 'I') and (s != 'M') and (s != 'S'):
-        raise BadFieldValue('code', line_num, s)
-      
-      # Check the language type field
-      s = r['ltype']
-      if (s != 'A') and (s != 'C') and (s != 'E') and \
-          (s != 'H') and (s != 'L') and (s != 'S'):
-        raise BadFieldValue('code', line_num, s)
-      
-      # If scope or language is special, both must be special
-      if (r['scope'] == 'S') or (r['ltype'] == 'S'):
-        if (r['scope'] != 'S') or (r['ltype'] != 'S'):
-          raise InconsistentSpecialError('code', line_num)
-      
-      # Make sure that none of the language codes are private or already
-      # in the index
-      if (r['code3'] in code_code) or is_private(r['code3']):
-        raise RedefineError('code', line_num, r['code3'])
-      
-      if 'biblio3' in r:
-        if (r['biblio3'] in code_code) or is_private(r['biblio3']):
-          raise RedefineError('code', line_num, r['biblio3'])
-      
-      if 'term3' in r:
-        if (r['term3'] in code_code) or is_private(r['term3']):
-          raise RedefineError('code', line_num, r['term3'])
-      
-      if 'code2' in r:
-        if r['code2'] in code_code:
-          raise RedefineError('code', line_num, r['code2'])
-      
-      # Define the tuple pair of the line number and the record
-      pr = (line_num, r)
-      
-      # Add the tuple to the parsed variables
-      rec_code.append(pr)
-      code_code[r['code3']] = pr
-      if 'biblio3' in r:
-        code_code[r['biblio3']] = pr
-      if 'term3' in r:
-        code_code[r['term3']] = pr
-      if 'code2' in r:
-        code_code[r['code2']] = pr
+  # The index pairs are collected in flat lists during the loop and the
+  # index dictionaries are built from them in one shot afterward, so
+  # the dictionaries are sized once at full fill instead of rehashing
+  # as they grow
+  all_pairs = []   # (language code, record) pairs
+  pair_lines = []  # (language code, line number) pairs
+
+  # Iterate the parsed rows, with the shared row iterator handling
+  # reading, tokenization, the header row, and field extraction
+  for r in iter_rows(
+      fpath, 'code', code_colmap, code_required, 8, CodeRow):
+
+    # Get the line number of the row
+    line_num = r.line
+
+    # Make sure the required fields are present
+    if r.code3 is None:
+      raise FieldMissingError('code', line_num, 'code3')
+    if r.scope is None:
+      raise FieldMissingError('code', line_num, 'scope')
+    if r.ltype is None:
+      raise FieldMissingError('code', line_num, 'ltype')
+    if r.name is None:
+      raise FieldMissingError('code', line_num, 'name')
+
+    # Check the raw format of the language codes
+    if not check_code_3(r.code3):
+      raise BadCode('code', line_num, r.code3)
+
+    if r.biblio3 is not None:
+      if not check_code_3(r.biblio3):
+        raise BadCode('code', line_num, r.biblio3)
+
+    if r.term3 is not None:
+      if not check_code_3(r.term3):
+        raise BadCode('code', line_num, r.term3)
+
+    if r.code2 is not None:
+      if not check_code_2(r.code2):
+        raise BadCode('code', line_num, r.code2)
+
+    # Intern the language codes, so that the index keys, the record
+    # fields, and the references from the other tables all share one
+    # string object per code and comparisons can short-circuit on
+    # identity
+    r.code3 = sys.intern(r.code3)
+    if r.biblio3 is not None:
+      r.biblio3 = sys.intern(r.biblio3)
+    if r.term3 is not None:
+      r.term3 = sys.intern(r.term3)
+    if r.code2 is not None:
+      r.code2 = sys.intern(r.code2)
+
+    # If the term3 code is present, it must be equal to the main code
+    if r.term3 is not None:
+      if r.term3 != r.code3:
+        raise ISOSyncError('code', line_num, r.term3)
+
+    # For better consistency with ISO-639-2, remove the biblio3 code
+    # if it is the same as the term3 code
+    if (r.biblio3 is not None) and (r.term3 is not None):
+      if r.biblio3 == r.term3:
+        r.biblio3 = None
+
+    # If biblio3 is still present, term3 must also be present
+    if r.biblio3 is not None:
+      if r.term3 is None:
+        raise ISOMissingError('code', line_num, r.biblio3)
+
+    # Check the scope field and replace it with its canonical
+    # singleton
+    s = r.scope
+    if s not in scope_codes:
+      raise BadFieldValue('code', line_num, s)
+    r.scope = scope_intern[s]
+
+    # Check the language type field and replace it with its canonical
+    # singleton
+    s = r.ltype
+    if s not in ltype_codes:
+      raise BadFieldValue('code', line_num, s)
+    r.ltype = ltype_intern[s]
+
+    # If scope or language is special, both must be special
+    if (r.scope == 'S') or (r.ltype == 'S'):
+      if (r.scope != 'S') or (r.ltype != 'S'):
+        raise InconsistentSpecialError('code', line_num)
+
+    # Collect the list of distinct language codes defined by this
+    # record, making sure that none of the three-letter codes are
+    # private; the term3 code is not collected because the checks
+    # above guarantee that when it is present it equals the code3
+    # code, and that the biblio3 code differs from it
+    lcode = [r.code3]
+    if r.biblio3 is not None:
+      lcode.append(r.biblio3)
+
+    for c in lcode:
+      if is_private(c):
+        raise RedefineError('code', line_num, c)
+
+    if r.code2 is not None:
+      lcode.append(r.code2)
+
+    # Add the record to the parsed variables and collect the index
+    # pairs; redefined codes are detected after the loop when the
+    # index is built
+    rec_local.append(r)
+    for c in lcode:
+      all_pairs.append((c, r))
+      pair_lines.append((c, line_num))
+
+  # Build the index dictionaries in one shot from the collected pairs;
+  # if any language code was defined more than once, the dictionary
+  # will come out smaller than the pair list, in which case scan the
+  # pairs to find and report the offending code
+  code_code = dict(all_pairs)
+  code_code_line = dict(pair_lines)
+  if len(code_code) != len(all_pairs):
+    seen = set()
+    for c, ln in pair_lines:
+      if c in seen:
+        raise RedefineError('code', ln, c)
+      seen.add(c)
 
 # Parse the retire table from the given ISO-639-3 data file that stores
 # the retired code table and store the parsed result in the module-level
@@ -844,193 +1166,147 @@ def parse_code(fpath):
 #
 # Parameters:
 #
-#   fpath : string - the path to the data file
+#   fpath : string or path-like object - the path to the data file
 #
 def parse_retire(fpath):
 
-  global rec_retire, code_retire
+  global rec_retire, code_retire, code_retire_line
   global rec_code, code_code
   
   # Check state
   if (rec_code is None) or (code_code is None):
     raise LogicError()
   
-  # Check parameter
-  if not isinstance(fpath, str):
-    raise LogicError()
-
   # Clear the records variable to an empty list and set the code
   # dictionary to an empty dictionary
   rec_retire = []
   code_retire = dict()
+  code_retire_line = dict()
 
-  # Open the input file as a text file in UTF-8 encoding and parse all
-  # the records
-  with open(fpath, mode='rt',
-            encoding='utf-8', errors='strict') as fin:
+  # Bind the tables to local variables so the per-row loop resolves
+  # them with fast local lookups instead of module attribute lookups;
+  # all mutation is in place, so the module-level variables stay in
+  # sync
+  rec_local = rec_retire
+  code_local = code_code
 
-    # We have the input file open -- read line by line
-    line_num = 0  # Current line number
-    fmap = None   # Mapping of fields to column indices
-    for line in fin:
-      
-      # Update line count
-      line_num = line_num + 1
-      
-      # If this is the first line, remove UTF-8 Byte Order Mark (BOM)
-      # if present
-      if line_num <= 1:
-        line = strip_bom(line)
-      
-      # Trim trailing whitespace and linebreaks
-      line = line.rstrip(' \t\n')
-      
-      # If this is the first line, set up fmap and skip rest of
-      # processing
-      if line_num <= 1:
-        
-        # Parse into columns
-        cn = line.split('\t')
-        
-        # Should be at least six columns
-        if len(cn) < 6:
-          raise BadHeader('retire')
-          
-        # Trim all column names and make them lowercase
-        for x in range(0, len(cn)):
-          cn[x] = cn[x].strip(' \t').lower()
-        
-        # Set fmap variable
-        fmap = dict()
-        for i in range(0, len(cn)):
-          # Get current column name
-          n = cn[i]
-          
-          # Only process this column if one of the recognized column
-          # names (in lowercase)
-          if (n == 'id') or (n == 'ref_name') or \
-              (n == 'ret_reason') or (n == 'change_to') or \
-              (n == 'ret_remedy') or (n == 'effective'):
-            
-            # Map name to standard dictionary name
-            if (n == 'id'):
-              n = 'code3'
-            elif (n == 'ref_name'):
-              n = 'name'
-            elif (n == 'ret_reason'):
-              n = 'reason'
-            elif (n == 'change_to'):
-              n = 'mapping'
-            elif (n == 'ret_remedy'):
-              n = 'comment'
-            elif (n == 'effective'):
-              n = 'date'
-            else:
-              raise LogicError()
-            
-            # Make sure name not already mapped
-            if n in fmap:
-              raise BadHeader('retire')
-            
-            # Store name to column index mapping
-            fmap[n] = i
-        
-        # Make sure we found all the required columns
-        if ('code3' not in fmap) or ('name' not in fmap) or \
-            ('reason' not in fmap) or ('mapping' not in fmap) or \
-            ('comment' not in fmap) or ('date' not in fmap):
-          raise BadHeader('retire')
-        
-        # Skip rest of processing
-        continue
-      
-      # Filter out blank lines that are empty or contain only spaces,
-      # tabs, and line breaks
-      if len(line) < 1:
-        continue
-      
-      # We have a content line, so parse into fields using the
-      # horizontal tab as separator
-      fv = line.split('\t')
-      
-      # Trim each field of leading and trailing whitespace
-      for i in range(0, len(fv)):
-        fv[i] = fv[i].strip(' \t')
-      
-      # Create a new record and assign all the fields that are present
-      r = dict()
-      for fnm in fmap:
-        if len(fv) > fmap[fnm]:
-          if len(fv[fmap[fnm]]) > 0:
-            r[fnm] = fv[fmap[fnm]]
-      
-      # Perform any corrections to the records and skip record entirely
-      # if it should be dropped
-      if not fix_retire(r):
-        continue
-      
-      # Make sure the required fields are present
-      if 'code3' not in r:
-        raise FieldMissingError('retire', line_num, 'code3')
-      if 'name' not in r:
-        raise FieldMissingError('retire', line_num, 'name')
-      if 'reason' not in r:
-        raise FieldMissingError('retire', line_num, 'reason')
-      if 'date' not in r:
-        raise FieldMissingError('retire', line_num, 'date')
-      
-      # Check the reason code
-      s = r['reason']
-      if (s != 'C') and (s != 'D') and (s != 'N') and \
-          (s != 'S') and (s != 'M'):
-        raise BadFieldValue('retire', line_num, s)
-      
-      # If reason is C D or M then mapping field MUST be present;
-      # otherwise, it MUST NOT be present
-      s = r['reason']
-      if (s == 'C') or (s == 'D') or (s == 'M'):
-        if 'mapping' not in r:
-          raise FieldMissingError('retire', line_num, 'mapping')
-      else:
-        if 'mapping' in r:
-          raise BadMappingContext('retire', line_num)
-      
-      # Check the raw format of the language codes
-      if not check_code_3(r['code3']):
-        raise BadCode('retire', line_num, r['code3'])
-      
-      if 'mapping' in r:
-        if not check_code_3(r['mapping']):
-          raise BadCode('retire', line_num, r['mapping'])
-      
-      # The retired code must not be in the main table unless it is a
-      # duplicate, in which case it must just not equal the mapping
-      if r['reason'] != 'D':
-        if r['code3'] in code_code:
-          raise UnretiredError('retire', line_num, r['code3'])
-      else:
-        if r['code3'] == r['mapping']:
-          raise SelfMappingError('retire', line_num)
-      
-      # If mapping is present, it must be in the main table AND it must
-      # map to a code3 column value
-      if 'mapping' in r:
-        if r['mapping'] not in code_code:
-          raise BadForeignKey('retire', line_num, r['mapping'])
-        if code_code[r['mapping']][1]['code3'] != r['mapping']:
-          raise BadForeignKey('retire', line_num, r['mapping'])
-      
-      # Make sure that the retired language code is not private and not
-      # already in the index
-      if (r['code3'] in code_retire) or is_private(r['code3']):
-        raise RedefineError('retire', line_num, r['code3'])
-      
-      # Define the tuple pair of the line number and the record
-      pr = (line_num, r)
-      
-      # Add the tuple to the parsed variables
-      rec_retire.append(pr)
-      code_retire[r['code3']] = pr
+  # The set of primary code3 values in the main code table, together
+  # with the queue of (line number, mapping) references collected
+  # during the loop; the mapping foreign keys are validated against the
+  # primary set in one batch after the loop
+  primary_codes = frozenset(rr.code3 for rr in rec_code)
+  fk_refs = []
+
+  # The (code, record) and (code, line number) pairs collected during
+  # the loop; the index dictionaries are built from these in one shot
+  # after the loop
+  all_pairs = []
+  pair_lines = []
+
+  # Iterate the parsed rows, with the shared row iterator handling
+  # reading, tokenization, the header row, and field extraction
+  for r in iter_rows(
+      fpath, 'retire', retire_colmap, retire_required, 6, RetireRow):
+
+    # Get the line number of the row
+    line_num = r.line
+
+    # Perform any corrections to the records and skip record entirely
+    # if it should be dropped
+    if not fix_retire(r):
+      continue
+
+    # Make sure the required fields are present
+    if r.code3 is None:
+      raise FieldMissingError('retire', line_num, 'code3')
+    if r.name is None:
+      raise FieldMissingError('retire', line_num, 'name')
+    if r.reason is None:
+      raise FieldMissingError('retire', line_num, 'reason')
+    if r.date is None:
+      raise FieldMissingError('retire', line_num, 'date')
+
+    # Intern the effective date; retirements are published in
+    # batches, so the same date string repeats across many rows
+    r.date = sys.intern(r.date)
+
+    # Check the reason code and replace it with its canonical
+    # singleton
+    s = r.reason
+    if s not in retire_reasons:
+      raise BadFieldValue('retire', line_num, s)
+    r.reason = reason_intern[s]
+
+    # If reason is C D or M then mapping field MUST be present;
+    # otherwise, it MUST NOT be present
+    if s in mapping_reasons:
+      if r.mapping is None:
+        raise FieldMissingError('retire', line_num, 'mapping')
+    else:
+      if r.mapping is not None:
+        raise BadMappingContext('retire', line_num)
+
+    # Check the raw format of the language codes
+    if not check_code_3(r.code3):
+      raise BadCode('retire', line_num, r.code3)
+
+    if r.mapping is not None:
+      if not check_code_3(r.mapping):
+        raise BadCode('retire', line_num, r.mapping)
+
+    # Intern the language codes so all the tables share one string
+    # object per code
+    r.code3 = sys.intern(r.code3)
+    if r.mapping is not None:
+      r.mapping = sys.intern(r.mapping)
+
+    # The retired code must not be in the main table unless it is a
+    # duplicate, in which case it must just not equal the mapping
+    if r.reason != 'D':
+      if r.code3 in code_local:
+        raise UnretiredError('retire', line_num, r.code3)
+    else:
+      if r.code3 == r.mapping:
+        raise SelfMappingError('retire', line_num)
+
+    # If mapping is present, it must reference a primary code3 value
+    # in the main table; queue the reference for the batched check
+    # after the loop
+    if r.mapping is not None:
+      fk_refs.append((line_num, r.mapping))
+
+    # Make sure that the retired language code is not private
+    if is_private(r.code3):
+      raise RedefineError('retire', line_num, r.code3)
+
+    # Add the record to the parsed variables and collect the index
+    # pairs; redefined codes are detected after the loop when the
+    # index is built
+    rec_local.append(r)
+    all_pairs.append((r.code3, r))
+    pair_lines.append((r.code3, line_num))
+
+  # Build the index dictionaries in one shot from the collected pairs;
+  # if any retired code appears more than once, the dictionary will
+  # come out smaller than the pair list, in which case scan the pairs
+  # to find and report the offending code
+  code_retire = dict(all_pairs)
+  code_retire_line = dict(pair_lines)
+  if len(code_retire) != len(all_pairs):
+    seen = set()
+    for c, ln in pair_lines:
+      if c in seen:
+        raise RedefineError('retire', ln, c)
+      seen.add(c)
+
+  # Validate the queued mapping foreign keys in one batch with a bulk
+  # set difference; only if some reference is bad is the queue walked
+  # again, to report the first offender in file order
+  bad = frozenset(m for ln, m in fk_refs) - primary_codes
+  if len(bad) > 0:
+    for ln, m in fk_refs:
+      if m in bad:
+        raise BadForeignKey('retire', ln, m)
 
 # Parse the name table from the given ISO-639-3 data file that stores
 # the name table and store the parsed result in the module-level 
@@ -1048,159 +1324,91 @@ def parse_retire(fpath):
 #
 # Parameters:
 #
-#   fpath : string - the path to the data file
+#   fpath : string or path-like object - the path to the data file
 #
 def parse_name(fpath):
 
-  global rec_name, code_name
+  global rec_name, code_name, code_name_line
   global rec_code, code_code
   
   # Check state
   if (rec_code is None) or (code_code is None):
     raise LogicError()
   
-  # Check parameter
-  if not isinstance(fpath, str):
-    raise LogicError()
-
   # Clear the records variable to an empty list and set the code
   # dictionary to an empty dictionary
   rec_name = []
   code_name = dict()
+  code_name_line = dict()
 
-  # Open the input file as a text file in UTF-8 encoding and parse all
-  # the records
-  with open(fpath, mode='rt',
-            encoding='utf-8', errors='strict') as fin:
+  # Collect the name and line indices in defaultdicts during the loop,
+  # so that appending to the list for a language code is a single
+  # hashed lookup instead of a membership probe followed by a
+  # subscript; the indices are frozen into plain dictionaries after
+  # the loop
+  name_index = collections.defaultdict(list)
+  line_index = collections.defaultdict(list)
 
-    # We have the input file open -- read line by line
-    line_num = 0  # Current line number
-    fmap = None   # Mapping of fields to column indices
-    for line in fin:
-      
-      # Update line count
-      line_num = line_num + 1
-      
-      # If this is the first line, remove UTF-8 Byte Order Mark (BOM)
-      # if present
-      if line_num <= 1:
-        line = strip_bom(line)
-      
-      # Trim trailing whitespace and linebreaks
-      line = line.rstrip(' \t\n')
-      
-      # If this is the first line, set up fmap and skip rest of
-      # processing
-      if line_num <= 1:
-        
-        # Parse into columns
-        cn = line.split('\t')
-        
-        # Should be at least three columns
-        if len(cn) < 3:
-          raise BadHeader('name')
-          
-        # Trim all column names and make them lowercase
-        for x in range(0, len(cn)):
-          cn[x] = cn[x].strip(' \t').lower()
-        
-        # Set fmap variable
-        fmap = dict()
-        for i in range(0, len(cn)):
-          # Get current column name
-          n = cn[i]
-          
-          # Only process this column if one of the recognized column
-          # names (in lowercase)
-          if (n == 'id') or (n == 'print_name') or \
-              (n == 'inverted_name'):
-            
-            # Map name to standard dictionary name
-            if (n == 'id'):
-              n = 'code3'
-            elif (n == 'print_name'):
-              n = 'name'
-            elif (n == 'inverted_name'):
-              n = 'iname'
-            else:
-              raise LogicError()
-            
-            # Make sure name not already mapped
-            if n in fmap:
-              raise BadHeader('name')
-            
-            # Store name to column index mapping
-            fmap[n] = i
-        
-        # Make sure we found all the required columns
-        if ('code3' not in fmap) or ('name' not in fmap) or \
-            ('iname' not in fmap):
-          raise BadHeader('name')
-        
-        # Skip rest of processing
-        continue
-      
-      # Filter out blank lines that are empty or contain only spaces,
-      # tabs, and line breaks
-      if len(line) < 1:
-        continue
-      
-      # We have a content line, so parse into fields using the
-      # horizontal tab as separator
-      fv = line.split('\t')
-      
-      # Trim each field of leading and trailing whitespace
-      for i in range(0, len(fv)):
-        fv[i] = fv[i].strip(' \t')
-      
-      # Create a new record and assign all the fields that are present
-      r = dict()
-      for fnm in fmap:
-        if len(fv) > fmap[fnm]:
-          if len(fv[fmap[fnm]]) > 0:
-            r[fnm] = fv[fmap[fnm]]
-      
-      # Make sure the required fields are present
-      if 'code3' not in r:
-        raise FieldMissingError('name', line_num, 'code3')
-      if 'name' not in r:
-        raise FieldMissingError('name', line_num, 'name')
-      if 'iname' not in r:
-        raise FieldMissingError('name', line_num, 'iname')
-      
-      # Check the raw format of the language code
-      if not check_code_3(r['code3']):
-        raise BadCode('name', line_num, r['code3'])
-      
-      # The language code must be in the main table AND it must map to
-      # a code3 language code
-      if r['code3'] not in code_code:
-        raise BadForeignKey('name', line_num, r['code3'])
-      if code_code[r['code3']][1]['code3'] != r['code3']:
-        raise BadForeignKey('name', line_num, r['code3'])
-      
-      # Make sure that the language code is not private
-      if is_private(r['code3']):
-        raise RedefineError('name', line_num, r['code3'])
-      
-      # Define the tuple pair of the line number and the record
-      pr = (line_num, r)
-      
-      # Add the tuple to the parsed variables -- for the name index,
-      # however, remember that it has to be a list of records rather
-      # than just a record since multiple names can map to the same
-      # language code
-      rec_name.append(pr)
-      if r['code3'] in code_name:
-        code_name[r['code3']].append(pr)
-      else:
-        code_name[r['code3']] = [pr]
+  # Iterate the parsed rows, with the shared row iterator handling
+  # reading, tokenization, the header row, and field extraction
+  for r in iter_rows(
+      fpath, 'name', name_colmap, name_required, 3, NameRow):
+
+    # Get the line number of the row
+    line_num = r.line
+
+    # Make sure the required fields are present
+    if r.code3 is None:
+      raise FieldMissingError('name', line_num, 'code3')
+    if r.name is None:
+      raise FieldMissingError('name', line_num, 'name')
+    if r.iname is None:
+      raise FieldMissingError('name', line_num, 'iname')
+
+    # Check the raw format of the language code
+    if not check_code_3(r.code3):
+      raise BadCode('name', line_num, r.code3)
+
+    # Intern the language code so all the tables share one string
+    # object per code
+    r.code3 = sys.intern(r.code3)
+
+    # The language code must be in the main table AND it must map to
+    # a code3 language code; a single probe with get() covers both
+    # checks, since None means the code is not in the main table
+    target = code_code.get(r.code3)
+    if target is None:
+      raise BadForeignKey('name', line_num, r.code3)
+    if target.code3 != r.code3:
+      raise BadForeignKey('name', line_num, r.code3)
+
+    # Make sure that the language code is not private
+    if is_private(r.code3):
+      raise RedefineError('name', line_num, r.code3)
+
+    # Add the record to the parsed variables -- for the name index,
+    # however, remember that it has to be a list of records rather
+    # than just a record since multiple names can map to the same
+    # language code
+    rec_name.append(r)
+    name_index[r.code3].append(r)
+    line_index[r.code3].append(line_num)
+
+  # Freeze the indices into plain dictionaries, so that lookups on a
+  # code with no names after parsing report a KeyError rather than
+  # silently growing the index
+  code_name = dict(name_index)
+  code_name_line = dict(line_index)
 
   # Make sure that every language code3 in the main code table has a
-  # name record
-  for rr in rec_code:
-    if rr[1]['code3'] not in code_name:
-      raise MissingNameError('name', rr[1]['code3'])
+  # name record, checking in bulk with a single set difference; only if
+  # some code is missing a name is the main table walked again, to
+  # report the first offender in file order
+  missing = frozenset(rr.code3 for rr in rec_code) - code_name.keys()
+  if len(missing) > 0:
+    for rr in rec_code:
+      if rr.code3 in missing:
+        raise MissingNameError('name', rr.code3)
 
 # Parse the macro table from the given ISO-639-3 data file that stores
 # the macrolanguage table and store the parsed result in the
@@ -1218,11 +1426,11 @@ def parse_name(fpath):
 #
 # Parameters:
 #
-#   fpath : string - the path to the data file
+#   fpath : string or path-like object - the path to the data file
 #
 def parse_macro(fpath):
 
-  global rec_macro, code_macro
+  global rec_macro, code_macro, code_macro_line
   global rec_code, code_code
   global rec_retire, code_retire
   
@@ -1232,189 +1440,280 @@ def parse_macro(fpath):
   if (rec_retire is None) or (code_retire is None):
     raise LogicError()
   
-  # Check parameter
-  if not isinstance(fpath, str):
-    raise LogicError()
-
   # Clear the records variable to an empty list and set the code
   # dictionary to an empty dictionary
   rec_macro = []
   code_macro = dict()
+  code_macro_line = dict()
 
-  # Open the input file as a text file in UTF-8 encoding and parse all
-  # the records
-  with open(fpath, mode='rt',
-            encoding='utf-8', errors='strict') as fin:
+  # The sets of primary code3 values in the main code table that have
+  # macrolanguage scope and individual language scope, together with
+  # the queues of (line number, code) references collected during the
+  # loop; the foreign keys are validated against these sets in batches
+  # after the loop
+  macro_targets = frozenset(
+      rr.code3 for rr in rec_code if rr.scope == 'M')
+  indiv_targets = frozenset(
+      rr.code3 for rr in rec_code if rr.scope == 'I')
+  fk_macro = []
+  fk_active = []
+  fk_inactive = []
 
-    # We have the input file open -- read line by line
-    line_num = 0  # Current line number
-    fmap = None   # Mapping of fields to column indices
-    for line in fin:
-      
-      # Update line count
-      line_num = line_num + 1
-      
-      # If this is the first line, remove UTF-8 Byte Order Mark (BOM)
-      # if present
-      if line_num <= 1:
-        line = strip_bom(line)
-      
-      # Trim trailing whitespace and linebreaks
-      line = line.rstrip(' \t\n')
-      
-      # If this is the first line, set up fmap and skip rest of
-      # processing
-      if line_num <= 1:
-        
-        # Parse into columns
-        cn = line.split('\t')
-        
-        # Should be at least three columns
-        if len(cn) < 3:
-          raise BadHeader('macro')
-          
-        # Trim all column names and make them lowercase
-        for x in range(0, len(cn)):
-          cn[x] = cn[x].strip(' \t').lower()
-        
-        # Set fmap variable
-        fmap = dict()
-        for i in range(0, len(cn)):
-          # Get current column name
-          n = cn[i]
-          
-          # Only process this column if one of the recognized column
-          # names (in lowercase)
-          if (n == 'm_id') or (n == 'i_id') or (n == 'i_status'):
-            
-            # Map name to standard dictionary name
-            if (n == 'm_id'):
-              n = 'macro3'
-            elif (n == 'i_id'):
-              n = 'code3'
-            elif (n == 'i_status'):
-              n = 'active'
-            else:
-              raise LogicError()
-            
-            # Make sure name not already mapped
-            if n in fmap:
-              raise BadHeader('macro')
-            
-            # Store name to column index mapping
-            fmap[n] = i
-        
-        # Make sure we found all the required columns
-        if ('macro3' not in fmap) or ('code3' not in fmap) or \
-            ('active' not in fmap):
-          raise BadHeader('macro')
-        
-        # Skip rest of processing
-        continue
-      
-      # Filter out blank lines that are empty or contain only spaces,
-      # tabs, and line breaks
-      if len(line) < 1:
-        continue
-      
-      # We have a content line, so parse into fields using the
-      # horizontal tab as separator
-      fv = line.split('\t')
-      
-      # Trim each field of leading and trailing whitespace
-      for i in range(0, len(fv)):
-        fv[i] = fv[i].strip(' \t')
-      
-      # Create a new record and assign all the fields that are present
-      r = dict()
-      for fnm in fmap:
-        if len(fv) > fmap[fnm]:
-          if len(fv[fmap[fnm]]) > 0:
-            r[fnm] = fv[fmap[fnm]]
-      
-      # Make sure the required fields are present
-      if 'macro3' not in r:
-        raise FieldMissingError('macro', line_num, 'macro3')
-      if 'code3' not in r:
-        raise FieldMissingError('macro', line_num, 'code3')
-      if 'active' not in r:
-        raise FieldMissingError('macro', line_num, 'active')
-      
-      # Check the raw format of the language codes
-      if not check_code_3(r['macro3']):
-        raise BadCode('macro', line_num, r['macro3'])
-      if not check_code_3(r['code3']):
-        raise BadCode('macro', line_num, r['code3'])
-      
-      # Check the active field value and convert to boolean
-      if r['active'] == 'A':
-        r['active'] = True
-      elif r['active'] == 'R':
-        r['active'] = False
-      else:
-        raise BadFieldValue('macro', line_num, r['active'])
-      
-      # The macro code must be in the main table AND it must map to
-      # code3 language code AND the record it maps to must be a
-      # macrolanguage record
-      if r['macro3'] not in code_code:
-        raise BadForeignKey('macro', line_num, r['macro3'])
-      if code_code[r['macro3']][1]['code3'] != r['macro3']:
-        raise BadForeignKey('macro', line_num, r['macro3'])
-      if code_code[r['macro3']][1]['scope'] != 'M':
-        raise BadForeignKey('macro', line_num, r['macro3'])
-      
-      # If the record is active, the code3 must be in the main table AND
-      # it must map to code3 language code AND the record it maps to
-      # must be an individual language; if the record is not active, the
-      # code3 must NOT be in the main table but it MUST be in the retire
-      # table
-      if r['active']:
-        if r['code3'] not in code_code:
-          raise BadForeignKey('macro', line_num, r['code3'])
-        if code_code[r['code3']][1]['code3'] != r['code3']:
-          raise BadForeignKey('macro', line_num, r['code3'])
-        if code_code[r['code3']][1]['scope'] != 'I':
-          raise BadForeignKey('macro', line_num, r['code3'])
-      
-      else:
-        if r['code3'] in code_code:
-          raise BadForeignKey('macro', line_num, r['code3'])
-        if r['code3'] not in code_retire:
-          raise BadForeignKey('macro', line_num, r['code3'])
-      
-      # Make sure that the individual language code is not private and
-      # not already in the index
-      if (r['code3'] in code_macro) or is_private(r['code3']):
-        raise RedefineError('macro', line_num, r['code3'])
-      
-      # Define the tuple pair of the line number and the record
-      pr = (line_num, r)
-      
-      # Add the tuple to the parsed variables
-      rec_macro.append(pr)
-      code_macro[r['code3']] = pr
+  # The (code, record) and (code, line number) pairs collected during
+  # the loop; the index dictionaries are built from these in one shot
+  # after the loop
+  all_pairs = []
+  pair_lines = []
+
+  # Iterate the parsed rows, with the shared row iterator handling
+  # reading, tokenization, the header row, and field extraction
+  for r in iter_rows(
+      fpath, 'macro', macro_colmap, macro_required, 3, MacroRow):
+
+    # Get the line number of the row
+    line_num = r.line
+
+    # Make sure the required fields are present
+    if r.macro3 is None:
+      raise FieldMissingError('macro', line_num, 'macro3')
+    if r.code3 is None:
+      raise FieldMissingError('macro', line_num, 'code3')
+    if r.active is None:
+      raise FieldMissingError('macro', line_num, 'active')
+
+    # Check the raw format of the language codes
+    if not check_code_3(r.macro3):
+      raise BadCode('macro', line_num, r.macro3)
+    if not check_code_3(r.code3):
+      raise BadCode('macro', line_num, r.code3)
+
+    # Intern the language codes so all the tables share one string
+    # object per code
+    r.macro3 = sys.intern(r.macro3)
+    r.code3 = sys.intern(r.code3)
+
+    # Check the active field value and convert to boolean with a
+    # single table lookup
+    av = active_codes.get(r.active)
+    if av is None:
+      raise BadFieldValue('macro', line_num, r.active)
+    r.active = av
+
+    # The macro code must reference a primary code3 value in the main
+    # table whose record is a macrolanguage record; queue the
+    # reference for the batched check after the loop
+    fk_macro.append((line_num, r.macro3))
+
+    # If the record is active, the code3 must reference a primary
+    # code3 value in the main table whose record is an individual
+    # language; if the record is not active, the code3 must NOT be in
+    # the main table but it MUST be in the retire table; queue the
+    # reference in the appropriate batch
+    if r.active:
+      fk_active.append((line_num, r.code3))
+    else:
+      fk_inactive.append((line_num, r.code3))
+
+    # Make sure that the individual language code is not private
+    if is_private(r.code3):
+      raise RedefineError('macro', line_num, r.code3)
+
+    # Add the record to the parsed variables and collect the index
+    # pairs; redefined codes are detected after the loop when the
+    # index is built
+    rec_macro.append(r)
+    all_pairs.append((r.code3, r))
+    pair_lines.append((r.code3, line_num))
+
+  # Build the index dictionaries in one shot from the collected pairs;
+  # if any individual language code appears more than once, the
+  # dictionary will come out smaller than the pair list, in which case
+  # scan the pairs to find and report the offending code
+  code_macro = dict(all_pairs)
+  code_macro_line = dict(pair_lines)
+  if len(code_macro) != len(all_pairs):
+    seen = set()
+    for c, ln in pair_lines:
+      if c in seen:
+        raise RedefineError('macro', ln, c)
+      seen.add(c)
+
+  # Validate the queued foreign keys in batches with bulk set
+  # operations; only if a batch finds a bad reference is its queue
+  # walked again, to report the first offender in file order
+  bad = frozenset(c for ln, c in fk_macro) - macro_targets
+  if len(bad) > 0:
+    for ln, c in fk_macro:
+      if c in bad:
+        raise BadForeignKey('macro', ln, c)
+
+  bad = frozenset(c for ln, c in fk_active) - indiv_targets
+  if len(bad) > 0:
+    for ln, c in fk_active:
+      if c in bad:
+        raise BadForeignKey('macro', ln, c)
+
+  refs = frozenset(c for ln, c in fk_inactive)
+  bad = (refs & code_code.keys()) | (refs - code_retire.keys())
+  if len(bad) > 0:
+    for ln, c in fk_inactive:
+      if c in bad:
+        raise BadForeignKey('macro', ln, c)
 
 # Function that sets all the module-level variables to None.
 #
 def blank_vars():
   
-  global rec_code, code_code
-  global rec_name, code_name
-  global rec_macro, code_macro
-  global rec_retire, code_retire
+  global rec_code, code_code, code_code_line
+  global rec_name, code_name, code_name_line
+  global rec_macro, code_macro, code_macro_line
+  global rec_retire, code_retire, code_retire_line
   
   rec_code = None
   code_code = None
+  code_code_line = None
   
   rec_name = None
   code_name = None
+  code_name_line = None
   
   rec_macro = None
   code_macro = None
+  code_macro_line = None
   
   rec_retire = None
   code_retire = None
+  code_retire_line = None
+
+# Compute the cache validation key for the given data file paths.
+#
+# The key records the path, size, and modification time of each data
+# file, so a cache written from different files or from files that
+# have since changed will not validate.
+#
+# Exceptions from os.stat() pass through to the caller.
+#
+# Parameters:
+#
+#   fpaths : tuple of str - the paths to the four data files
+#
+# Return:
+#
+#   a tuple usable as the cache validation key
+#
+def cache_key(fpaths):
+
+  key = []
+  for p in fpaths:
+    st = os.stat(p)
+    key.append((p, st.st_size, st.st_mtime_ns))
+  return tuple(key)
+
+# Try to load the parsed tables from the cache file.
+#
+# The cache_path module variable must not be None when this is called.
+# If the cache file can be read, unpickled, and its stored key matches
+# the cache validation key of the given data file paths, the
+# module-level table variables are set from the cache and True is
+# returned.  In all other cases the module-level variables are left
+# untouched and False is returned, so the caller falls back to a full
+# parse.
+#
+# Parameters:
+#
+#   fpaths : tuple of str - the paths to the four data files
+#
+# Return:
+#
+#   True if the tables were loaded from the cache, False otherwise
+#
+def load_cache(fpaths):
+
+  global rec_code, code_code, code_code_line
+  global rec_name, code_name, code_name_line
+  global rec_macro, code_macro, code_macro_line
+  global rec_retire, code_retire, code_retire_line
+
+  # Read and unpickle the cache file, treating any failure as a cache
+  # miss; the unpickler can raise nearly anything on corrupt or
+  # truncated data, so the net is deliberately wide
+  try:
+    with open(cache_path, 'rb') as fin:
+      obj = pickle.load(fin)
+  except Exception:
+    return False
+
+  # The cache must hold a dictionary whose stored key matches the
+  # current state of the data files
+  if not isinstance(obj, dict):
+    return False
+  try:
+    ck = cache_key(fpaths)
+  except OSError:
+    return False
+  if obj.get('key') != ck:
+    return False
+
+  # Cache is valid, so bind all the table variables from it
+  rec_code = obj['rec_code']
+  code_code = obj['code_code']
+  code_code_line = obj['code_code_line']
+
+  rec_name = obj['rec_name']
+  code_name = obj['code_name']
+  code_name_line = obj['code_name_line']
+
+  rec_macro = obj['rec_macro']
+  code_macro = obj['code_macro']
+  code_macro_line = obj['code_macro_line']
+
+  rec_retire = obj['rec_retire']
+  code_retire = obj['code_retire']
+  code_retire_line = obj['code_retire_line']
+
+  return True
+
+# Write the parsed tables to the cache file.
+#
+# The cache_path module variable must not be None and the module-level
+# table variables must all be filled in when this is called.  Failure
+# to write the cache is ignored, since the cache is only an
+# optimization.
+#
+# Parameters:
+#
+#   fpaths : tuple of str - the paths to the four data files
+#
+def save_cache(fpaths):
+
+  obj = {
+    'key': cache_key(fpaths),
+    'rec_code': rec_code,
+    'code_code': code_code,
+    'code_code_line': code_code_line,
+    'rec_name': rec_name,
+    'code_name': code_name,
+    'code_name_line': code_name_line,
+    'rec_macro': rec_macro,
+    'code_macro': code_macro,
+    'code_macro_line': code_macro_line,
+    'rec_retire': rec_retire,
+    'code_retire': code_retire,
+    'code_retire_line': code_retire_line}
+
+  # Write to a temporary file alongside the cache and rename it into
+  # place, so an interrupted run can never leave a half-written cache
+  # file behind; os.replace() is atomic on the same file system
+  tpath = cache_path + '.tmp'
+  try:
+    with open(tpath, 'wb') as fout:
+      pickle.dump(obj, fout, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tpath, cache_path)
+  except OSError:
+    try:
+      os.remove(tpath)
+    except OSError:
+      pass
 
 #
 # Public functions
@@ -1429,6 +1728,11 @@ def blank_vars():
 #
 # If all the parsed variables are not None, then the call is ignored.
 #
+# If the cache_path module variable has been set, this function will
+# try to load the parsed tables from the cache file before parsing,
+# and will rewrite the cache file after a successful parse.  See the
+# cache_path documentation for further information.
+#
 # If the function fails, all the rec and code values will be set to
 # None.
 #
@@ -1463,12 +1767,12 @@ def parse(fpath_code, fpath_name, fpath_macro, fpath_retire):
   # Blank all the module-level variables
   blank_vars()
 
-  # Check parameters
-  if (not isinstance(fpath_code, str)) or \
-      (not isinstance(fpath_retire, str)) or \
-      (not isinstance(fpath_name, str)) or \
-      (not isinstance(fpath_macro, str)):
-    raise LogicError()
+  # If a cache file is configured and it validates against the data
+  # files, load the tables from it and skip parsing entirely
+  fpaths = (fpath_code, fpath_name, fpath_macro, fpath_retire)
+  if cache_path is not None:
+    if load_cache(fpaths):
+      return
 
   # Try to parse all the tables in the proper parsing order
   try:
@@ -1509,5 +1813,6 @@ def parse(fpath_code, fpath_name, fpath_macro, fpath_retire):
     blank_vars()
     raise ISO3Error() from exc
 
-# @@TODO:
-parse('data/iso-639-3.tab', 'data/iso-639-3_Name_Index.tab', 'data/iso-639-3-macrolanguages.tab', 'data/iso-639-3_Retirements.tab')
+  # Parsing succeeded, so rewrite the cache file if one is configured
+  if cache_path is not None:
+    save_cache(fpaths)
@@ -17,6 +17,9 @@
 # also hold a mapping of all language codes to their records.
 #
 
+import csv
+import mmap
+
 #
 # Exceptions
 # ----------
@@ -135,11 +138,20 @@ rec = None
 # parsed records, or None if the file hasn't been parsed yet.
 #
 # Use the parse() function to set this variable.  Once it is set
-# successfully, it will be a dictionary with string keys and values that
-# are the same tuple objects used in the rec module-level variable.
+# successfully, it will be a dictionary with string keys and values
+# that are the same record dictionaries stored in the tuples of the rec
+# module-level variable.
 #
 code = None
 
+# The module-level variable that stores the index of language codes to
+# record line numbers, or None if the file hasn't been parsed yet.
+#
+# This is a dictionary parallel to code that maps the same keys to the
+# line numbers of the records in the data file.
+#
+code_line = None
+
 #
 # Local functions
 # ---------------
@@ -161,10 +173,21 @@ def check_code_3(cd):
     return False
   if len(cd) != 3:
     return False
-  for c in cd:
-    if (ord(c) < ord('a')) or (ord(c) > ord('z')):
-      return False
-  return True
+  if cd.isascii() and cd.isalpha() and cd.islower():
+    return True
+  else:
+    return False
+
+# The complete set of private-use language codes.
+#
+# The private-use range is qaa through qtz, which is only 520 codes in
+# total, so the full set is precomputed here once at import time and
+# the is_private check becomes a single hash lookup.
+#
+private_codes = frozenset(
+  'q' + a + b
+  for a in 'abcdefghijklmnopqrst'
+  for b in 'abcdefghijklmnopqrstuvwxyz')
 
 # Check whether the given language code is one of the private-use
 # language codes.
@@ -178,59 +201,59 @@ def check_code_3(cd):
 #   True if a private-use code, False otherwise
 #
 def is_private(cd):
-  
+
   # If parameter isn't string, it isn't a private-use code
   if not isinstance(cd, str):
     return False
-  
-  # If code isn't exactly three characters, it isn't private-use
-  if len(cd) != 3:
-    return False
-  
+
   # Language code matching is case-insensitive, so make the given
-  # language code lowercase
-  cd = cd.lower()
-  
-  # If first letter of language code isn't q, then it isn't private-use
-  if cd[0] != 'q':
-    return False
-  
-  # In order to be private use, second character must be in range a-t
-  # and third character must be in range a-z
-  if (ord(cd[1]) >= ord('a')) and (ord(cd[1]) <= ord('t')) and \
-      (ord(cd[2]) >= ord('a')) and (ord(cd[2]) <= ord('z')):
+  # language code lowercase and test it against the precomputed set;
+  # strings that aren't three lowercase letters starting with q are
+  # never in the set
+  if cd.lower() in private_codes:
     return True
   else:
     return False
 
-# Given a string holding the first line of text in a file, strip a
-# leading UTF-8 Byte Order Mark (BOM) if present.
+# Read the data file completely into memory and decode it to a
+# string.
 #
-# Only use this function on the very first line of the file, as that is
-# the only place a BOM may be present.
+# The file is mapped into memory so that the contents arrive in a
+# single read instead of many buffered reads, and the whole file is
+# decoded with one decoder call instead of one per line.  Decoding
+# uses the utf-8-sig codec, which also removes a leading UTF-8 Byte
+# Order Mark (BOM) if present.
 #
-# The return value is the string as-is if there is no BOM.
+# An empty file cannot be mapped, so it is returned as an empty
+# string.
 #
 # Parameters:
 #
-#   line : string - the first line to process
+#   fpath : string - the path to the data file
 #
 # Return:
 #
-#   the first line, with the BOM stripped out if present
+#   the decoded contents of the file
 #
-def strip_bom(line):
-  if not isinstance(line, str):
-    raise LogicError()
-  if len(line) < 1:
-    return line
-  if ord(line[0]) == 0xfeff:
-    if len(line) > 1:
-      return line[1:]
-    else:
-      return ''
-  else:
-    return line
+def read_data_file(fpath):
+  with open(fpath, 'rb') as fin:
+    raw = b''
+    if fin.seek(0, 2) > 0:
+      with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        raw = mm[:]
+  return raw.decode('utf-8-sig')
+
+# Mapping of the recognized column names in the data file header
+# (lowercased) to the standard field names used in parsed records,
+# along with the set of required standard field names.
+#
+header_colmap = {
+  'uri': 'uri',
+  'code': 'code',
+  'label (english)': 'en',
+  'label (french)': 'fr'}
+
+header_required = frozenset(header_colmap.values())
 
 #
 # Public functions
@@ -253,7 +276,7 @@ def strip_bom(line):
 #
 def parse(fpath):
 
-  global rec, code
+  global rec, code, code_line
 
   # Ignore call if rec already set
   if rec is not None:
@@ -263,157 +286,181 @@ def parse(fpath):
   if not isinstance(fpath, str):
     rec = None
     code = None
+    code_line = None
     raise LogicError()
 
   # Clear the records variable to an empty list and set the code
   # dictionary to an empty dictionary
   rec = []
   code = dict()
+  code_line = dict()
 
-  # Open the input file as a text file in UTF-8 encoding and parse all
-  # the records
+  # Read, decode, and parse all the records
   try:
-    with open(fpath, mode='rt',
-              encoding='utf-8', errors='strict') as fin:
-  
-      # We have the input file open -- read line by line
-      line_num = 0  # Current line number
-      fmap = None   # Mapping of fields to column indices
-      max_req = 0   # Required number of columns in each line
-      for line in fin:
-        
-        # Update line count
-        line_num = line_num + 1
-        
-        # If this is the first line, remove UTF-8 Byte Order Mark (BOM)
-        # if present
-        if line_num <= 1:
-          line = strip_bom(line)
-        
-        # Trim trailing whitespace and linebreaks
-        line = line.rstrip(' \t\n')
-        
-        # If this is the first line, set up fmap and skip rest of
-        # processing
-        if line_num <= 1:
-          
-          # Parse into columns
-          cn = line.split('\t')
-          
-          # Should be at least four columns
-          if len(cn) < 4:
-            raise BadHeader()
-            
-          # Trim all column names and make them lowercase
-          for x in range(0, len(cn)):
-            cn[x] = cn[x].strip(' \t').lower()
-          
-          # Set fmap and max_req variables
-          fmap = dict()
-          for i in range(0, len(cn)):
-            # Get current column name
-            n = cn[i]
-            
-            # Only process this column if one of the recognized column
-            # names (in lowercase)
-            if (n == 'uri') or (n == 'code') or \
-                (n == 'label (english)') or (n == 'label (french)'):
-              
-              # Map name to standard dictionary name
-              if (n == 'uri'):
-                n = 'uri'
-              elif (n == 'code'):
-                n = 'code'
-              elif (n == 'label (english)'):
-                n = 'en'
-              elif (n == 'label (french)'):
-                n = 'fr'
-              else:
-                raise LogicError()
-              
-              # Make sure name not already mapped
-              if n in fmap:
-                raise BadHeader()
-              
-              # Store name to column index mapping
-              fmap[n] = i
-              
-              # Update max_req
-              max_req = i + 1
-          
-          # Make sure we found all the four required columns
-          if ('uri' not in fmap) or ('code' not in fmap) or \
-              ('en' not in fmap) or ('fr' not in fmap):
-            raise BadHeader()
+
+    # Read and decode the whole file in one shot
+    data = read_data_file(fpath)
+
+    # Tokenize the rows with the C-implemented csv module, using the
+    # horizontal tab as separator; the data file never quotes fields
+    reader = csv.reader(
+        data.splitlines(), delimiter='\t', quoting=csv.QUOTE_NONE)
+
+    # Iterate the tokenized rows; the index pairs are collected in
+    # flat lists during the loop and the index dictionaries are
+    # built from them in one shot afterward
+    fmap = None      # Mapping of fields to column indices
+    max_req = 0      # Required number of columns in each line
+    all_pairs = []   # (language code, record) pairs
+    pair_lines = []  # (language code, line number) pairs
+    for fv in reader:
+
+      # Get the line number of this row from the reader
+      line_num = reader.line_num
+
+      # If this is the first line, set up fmap and skip rest of
+      # processing
+      if line_num <= 1:
+
+        # Get the column names; a leading BOM never reaches the
+        # header because the file is decoded with the utf-8-sig
+        # codec
+        cn = fv
+
+        # Should be at least four columns
+        if len(cn) < 4:
+          raise BadHeader()
           
-          # Skip rest of processing
-          continue
-        
-        # Filter out blank lines that are empty or contain only spaces,
-        # tabs, and line breaks
-        if len(line) < 1:
-          continue
-        
-        # We have a content line, so parse into fields using the
-        # horizontal tab as separator
-        fv = line.split('\t')
-        
-        # Each record must have at least the required number of columns
-        if len(fv) < max_req:
-          raise BadRecord(line_num)
-        
-        # Trim each field of leading and trailing whitespace
-        for i in range(0, len(fv)):
-          fv[i] = fv[i].strip(' \t')
-        
-        # Make sure the required fields are not empty
-        if (len(fv[fmap['uri']]) < 1) or \
-            (len(fv[fmap['code']]) < 1) or \
-            (len(fv[fmap['en']]) < 1) or \
-            (len(fv[fmap['fr']]) < 1):
-          raise FieldMissingError(line_num)
-        
-        # Create a new record and assign the required fields
-        r = dict()
-        r['uri'] = fv[fmap['uri']]
-        r['code'] = fv[fmap['code']]
-        r['en'] = fv[fmap['en']]
-        r['fr'] = fv[fmap['fr']]
-        
-        # Check the language code format
-        if not check_code_3(r['code']):
-          raise BadCode(line_num)
-        
-        # Make sure that the language code is not in the index yet and
-        # that it isn't in reserved private range
-        if r['code'] in code:
-          raise RedefineError(line_num, r['code'])
-        if is_private(r['code']):
-          raise RedefineError(line_num, r['code'])
-  
-        # Define the tuple pair of the line number and the record
-        pr = (line_num, r)
+        # Trim all column names and make them lowercase, with a
+        # list comprehension so the loop machinery runs in C
+        # instead of indexed assignments in the interpreter
+        cn = [c.strip().lower() for c in cn]
         
-        # Add the tuple to the parsed variables
-        rec.append(pr)
-        code[r['code']] = pr
-  
+        # Set fmap and max_req variables, renaming each recognized
+        # column name to its standard field name with a single table
+        # lookup
+        fmap = dict()
+        for i, c in enumerate(cn):
+          # Map current column name to its standard field name, or
+          # skip this column if it isn't one of the recognized
+          # column names
+          n = header_colmap.get(c)
+          if n is None:
+            continue
+
+          # Make sure name not already mapped
+          if n in fmap:
+            raise BadHeader()
+
+          # Store name to column index mapping
+          fmap[n] = i
+
+          # Update max_req
+          max_req = i + 1
+
+        # Make sure we found all the four required columns
+        if not header_required.issubset(fmap.keys()):
+          raise BadHeader()
+
+        # Hoist the column index of each required field into a
+        # local variable, so the record lines read fields with
+        # plain subscripts instead of a dictionary lookup per field
+        uri_idx = fmap['uri']
+        code_idx = fmap['code']
+        en_idx = fmap['en']
+        fr_idx = fmap['fr']
+
+        # Skip rest of processing
+        continue
+      
+      # Filter out blank lines that are empty or contain only spaces
+      # and tabs; a line of tabs tokenizes to several empty fields,
+      # so the line is blank whenever every field strips to nothing
+      if not any(f.strip() for f in fv):
+        continue
+
+      # Each record must have at least the required number of columns
+      if len(fv) < max_req:
+        raise BadRecord(line_num)
+      
+      # Trim each field of leading and trailing whitespace with a
+      # list comprehension, which runs the loop machinery in C
+      # instead of indexed assignments in the interpreter
+      fv = [f.strip() for f in fv]
+
+      # Make sure the required fields are not empty
+      if (len(fv[uri_idx]) < 1) or \
+          (len(fv[code_idx]) < 1) or \
+          (len(fv[en_idx]) < 1) or \
+          (len(fv[fr_idx]) < 1):
+        raise FieldMissingError(line_num)
+
+      # Get the language code and check its format, with the checks
+      # of check_code_3() inlined so the hot path pays no function
+      # call per record; the field is already known to be a string
+      c = fv[code_idx]
+      if len(c) != 3:
+        raise BadCode(line_num)
+      if not (c.isascii() and c.isalpha() and c.islower()):
+        raise BadCode(line_num)
+
+      # Create a new record and assign the required fields
+      r = dict()
+      r['uri'] = fv[uri_idx]
+      r['code'] = c
+      r['en'] = fv[en_idx]
+      r['fr'] = fv[fr_idx]
+
+      # Add the record to the parsed variables and collect the
+      # index pairs; redefined and private-use codes are detected
+      # after the loop when the index is built
+      rec.append((line_num, r))
+      all_pairs.append((c, r))
+      pair_lines.append((c, line_num))
+
+    # Build the index dictionaries in one shot from the collected
+    # pairs; if any language code was defined more than once, the
+    # dictionary will come out smaller than the pair list, in which
+    # case scan the pairs to find and report the offending code
+    code = dict(all_pairs)
+    code_line = dict(pair_lines)
+    if len(code) != len(all_pairs):
+      seen = set()
+      for c, ln in pair_lines:
+        if c in seen:
+          raise RedefineError(ln, c)
+        seen.add(c)
+
+    # Make sure no language code is in the reserved private-use
+    # range, checking in bulk with one set intersection; only if a
+    # private code is present are the pairs scanned again, to report
+    # the first offender in file order
+    bad = code.keys() & private_codes
+    if len(bad) > 0:
+      for c, ln in pair_lines:
+        if c in bad:
+          raise RedefineError(ln, c)
+
   except FileNotFoundError:
     rec = None
     code = None
+    code_line = None
     raise NoDataFileError(fpath)
   
   except ValueError:
     rec = None
     code = None
+    code_line = None
     raise BadDataFile()
     
   except ISO5Error as se:
     rec = None
     code = None
+    code_line = None
     raise se
   
   except Exception as exc:
     rec = None
     code = None
+    code_line = None
     raise ISO5Error() from exc
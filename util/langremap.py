@@ -35,10 +35,16 @@
 # Operation
 # ---------
 #
-# This program begins by using the fulldb module to load the full
-# language tag database into memory and check for consistency.
+# This program begins by using the fulldb_cache module to load the
+# full language tag database into memory, through the disk cache when
+# possible, and check for consistency.
 #
-# Then, the program iterates through all the "language" records in the
+# Then, the program records the mappings of all records in the
+# ISO-639-3 retirements table that have a "mapping" field in the
+# dictionary, except for the "adp" record, which is handled in the
+# next step.
+#
+# Next, the program iterates through all the "language" records in the
 # subtag registry that have a "preferred-value" field.  For language
 # subtags that have two characters, the program adds those archaic tag
 # mappings to the dictionary.  For language subtags with three
@@ -46,22 +52,19 @@
 # exist in the (automatically corrected) ISO-639-3 retirements table,
 # except for the adp language tag, which maps to the "dz" in the subtag
 # registry but maps to its three-letter equivalent code "dzo" in the
-# ISO-639-3 retirements table.
-#
-# Next, the program iterates through all records in the ISO-639-3
-# retirements table that have a "mapping" field.  All these mappings are
-# recorded in the dictionary, except that the "adp" record is altered to
-# map to the equivalent two-letter code "dz" instead.
+# ISO-639-3 retirements table; the "dz" mapping from the subtag
+# registry is the one recorded in the dictionary.
 #
 # Finally, the program prints the generated language remapping
 # dictionary out to standard output as JSON text.
 #
 
 import fulldb
-import io
+import fulldb_cache
 import iso2
 import iso3
 import iso5
+import json
 import subtag
 import sys
 
@@ -87,7 +90,7 @@ dfp.iso5_path = sys.argv[7]
 # data files and check consistency
 #
 try:
-  fulldb.parse_all(dfp)
+  fulldb_cache.load_or_parse(dfp)
 
 except fulldb.FullDBError as fde:
   print('Error while loading full database!')
@@ -114,118 +117,69 @@ except subtag.SubtagError as ste:
   print(ste)
   sys.exit(1)
 
-# Start the language remapping dictionary out empty
+# Start the language remapping dictionary out with all the mapped
+# records from the ISO-639-3 retirements table, with a dictionary
+# comprehension so the loop machinery runs in C; the iso3 module has
+# automatically performed the needed corrections for us, and the
+# exceptional "adp" record is excluded here because its mapping is
+# taken from the subtag registry below instead
 #
-rmd = dict()
+rmd = dict(
+  (r.code3, r.mapping) for r in iso3.rec_retire
+  if (r.mapping is not None) and (r.code3 != 'adp'))
 
 # Go through all the records in the subtag registry, add archaic tags to
 # the dictionary, and check that other mappings are consistent with
 # ISO-639-3
 #
 for sr in subtag.rec:
-  
+
   # Get the current record fields
   r = sr[1]
-  
+
   # Skip if not a language subtag record
   if r['type'] != 'language':
     continue
-  
+
   # Skip if record has no preferred-value mapping
   if 'preferred-value' not in r:
     continue
-  
+
   # Check length of language subtag to determine what to do
   if len(r['subtag']) == 2:
     # Archaic tag mapping, so add it to the dictionary
     rmd[r['subtag']] = r['preferred-value']
-    
+
   elif len(r['subtag']) == 3:
     # Regular mapping, so check that it is in the ISO-639-3 retirements
-    # table and that it has a mapping
-    if r['subtag'] not in iso3.code_retire:
+    # table and that it has a mapping; a single probe with get() covers
+    # both checks, since None means the subtag is not there at all
+    s = iso3.code_retire.get(r['subtag'])
+    if s is None:
       print('Subtag mappings are not proper subset!')
       sys.exit(1)
-    
-    if 'mapping' not in iso3.code_retire[r['subtag']][1]:
+
+    if s.mapping is None:
       print('Subtag mappings are inconsistent with ISO-639-3!')
       sys.exit(1)
-    
+
     # Except for the code "adp", check that ISO-639-3 retirements table
     # has an equivalent mapping; for "adp", add the mapping from the
     # subtag registry
     if r['subtag'] == 'adp':
       rmd[r['subtag']] = r['preferred-value']
-    
+
     else:
-      if r['preferred-value'] != \
-          iso3.code_retire[r['subtag']][1]['mapping']:
+      if r['preferred-value'] != s.mapping:
         print('Subtag mappings are inconsistent with ISO-639-3!')
         sys.exit(1)
-    
+
   else:
     # Shouldn't happen
     print('Invalid subtag found in subtag registry!')
     sys.exit(1)
 
-# Go through all the records in the ISO-639-3 retirements table and add
-# them to the dictionary
-#
-for rr in iso3.rec_retire:
-  
-  # Get the current record fields
-  r = rr[1]
-  
-  # Skip if no mapping field
-  if 'mapping' not in r:
-    continue
-  
-  # For exceptional case of adp, skip because we added the mapping
-  # earlier from the subtag registry
-  if r['code3'] == 'adp':
-    continue
-  
-  # If we get here, record the mapping normally; the iso3 module has
-  # automatically performed the needed corrections for us
-  rmd[r['code3']] = r['mapping']
-
-# Begin the JSON output
-#
-jsr = io.StringIO()
-jsr.write('{')
-
-# Get a list of all the remapped language subtags and sort them
-#
-tl = list(rmd)
-tl.sort()
-
-# Write all the mappings to the JSON file
-#
-first_rec = True
-for k in tl:
-  
-  # Get the remapped value
-  v = rmd[k]
-  
-  # Write the appropriate record separator, if necessary
-  if first_rec:
-    jsr.write('\n')
-    first_rec = False
-  else:
-    jsr.write(',\n')
-  
-  # Write the mapping -- no escaping is necessary since language subtags
-  # just have lowercase ASCII letters
-  jsr.write('  "')
-  jsr.write(k)
-  jsr.write('": "')
-  jsr.write(v)
-  jsr.write('"')
-
-# End the JSON output
-#
-jsr.write('\n}')
-
-# Write the full JSON object to output
+# Serialize the full dictionary to output as JSON, sorting the keys so
+# that the remapped language subtags are in alphabetical order
 #
-print(jsr.getvalue())
+print(json.dumps(rmd, indent=2, sort_keys=True))
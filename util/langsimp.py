@@ -35,8 +35,9 @@
 # Operation
 # ---------
 #
-# This program begins by using the fulldb module to load the full
-# language tag database into memory and check for consistency.
+# This program begins by using the fulldb_cache module to load the
+# full language tag database into memory, through the disk cache when
+# possible, and check for consistency.
 #
 # Then, the program adds the exceptional simplification mapping of "bih"
 # to "bh" to the simplification dictionary.
@@ -50,7 +51,8 @@
 #
 
 import fulldb
-import io
+import fulldb_cache
+import json
 import iso2
 import iso3
 import iso5
@@ -79,7 +81,7 @@ dfp.iso5_path = sys.argv[7]
 # data files and check consistency
 #
 try:
-  fulldb.parse_all(dfp)
+  fulldb_cache.load_or_parse(dfp)
 
 except fulldb.FullDBError as fde:
   print('Error while loading full database!')
@@ -112,71 +114,31 @@ except subtag.SubtagError as ste:
 smd = dict()
 smd['bih'] = 'bh'
 
-# Go through all the records in the ISO-639-3 main code table and add
-# the necessary mappings to the dictionary
-#
-for rr in iso3.rec_code:
-  
-  # Get the current record fields
-  r = rr[1]
-  
-  # Determine record type
-  if ('code2' in r) and ('biblio3' in r):
-    # Both a code2 and a unique biblio3 code, so map the main code and
-    # the biblio3 code to the code2
-    smd[r['code3']] = r['code2']
-    smd[r['biblio3']] = r['code2']
-    
-  elif 'code2' in r:
-    # Code2 but no unique biblio3 code, map the main code to code2
-    smd[r['code3']] = r['code2']
-    
-  elif 'biblio3' in r:
-    # Unique biblio3 code but no code2, so map the biblio3 code to the
-    # main code
-    smd[r['biblio3']] = r['code3']
-    
-  else:
-    # Other kinds of records don't have any mappings
-    pass
-
-# Begin the JSON output
-#
-jsr = io.StringIO()
-jsr.write('{')
-
-# Get a list of all the remapped language subtags and sort them
-#
-tl = list(smd)
-tl.sort()
+# Go through the records in the ISO-639-3 main code table and add the
+# necessary mappings to the dictionary, with one prefiltered pass per
+# record shape so the loop machinery runs in C instead of branching on
+# every record:
+#
+#   (1) records with a code2 map their main code to the code2
+#   (2) records with both a code2 and a unique biblio3 code also map
+#       the biblio3 code to the code2
+#   (3) records with a unique biblio3 code but no code2 map the
+#       biblio3 code to the main code
+#
+smd.update(
+  (r.code3, r.code2) for r in iso3.rec_code
+  if r.code2 is not None)
 
-# Write all the mappings to the JSON file
-#
-first_rec = True
-for k in tl:
-  
-  # Get the remapped value
-  v = smd[k]
-  
-  # Write the appropriate record separator, if necessary
-  if first_rec:
-    jsr.write('\n')
-    first_rec = False
-  else:
-    jsr.write(',\n')
-  
-  # Write the mapping -- no escaping is necessary since language subtags
-  # just have lowercase ASCII letters
-  jsr.write('  "')
-  jsr.write(k)
-  jsr.write('": "')
-  jsr.write(v)
-  jsr.write('"')
+smd.update(
+  (r.biblio3, r.code2) for r in iso3.rec_code
+  if (r.code2 is not None) and (r.biblio3 is not None))
 
-# End the JSON output
-#
-jsr.write('\n}')
+smd.update(
+  (r.biblio3, r.code3) for r in iso3.rec_code
+  if (r.biblio3 is not None) and (r.code2 is None))
 
-# Write the full JSON object to output
+# Serialize the full dictionary to output as JSON, sorting the keys so
+# that the remapped language subtags are in alphabetical order; the
+# C-implemented json encoder handles all the formatting in one call
 #
-print(jsr.getvalue())
+print(json.dumps(smd, indent=2, sort_keys=True))
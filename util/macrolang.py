@@ -35,8 +35,9 @@
 # Operation
 # ---------
 #
-# This program begins by using the fulldb module to load the full
-# language tag database into memory and check for consistency.
+# This program begins by using the fulldb_cache module to load the
+# full language tag database into memory, through the disk cache when
+# possible, and check for consistency.
 #
 # Then, the program iterates through all records in the ISO-639-3
 # macrolanguage table and stores all the mappings in the dictionary,
@@ -47,7 +48,8 @@
 #
 
 import fulldb
-import io
+import fulldb_cache
+import json
 import iso2
 import iso3
 import iso5
@@ -77,7 +79,7 @@ dfp.iso5_path = sys.argv[7]
 # data files and check consistency
 #
 try:
-  fulldb.parse_all(dfp)
+  fulldb_cache.load_or_parse(dfp)
 
 except fulldb.FullDBError as fde:
   print('Error while loading full database!')
@@ -111,68 +113,30 @@ md = dict()
 # Go through all the records in the ISO-639-3 macrolanguage table and
 # add them to the dictionary after normalizing and validating them
 #
-for rr in iso3.rec_macro:
-  
-  # Get the current record fields
-  r = rr[1]
+for r in iso3.rec_macro:
   
   # Get the individual language code and the macrolanguage code
-  ilc = r['code3']
-  mlc = r['macro3']
-  
+  ilc = r.code3
+  mlc = r.macro3
+
   # Normalize both
   ilc = langtag.norm(ilc)
   mlc = langtag.norm(mlc)
-  
+
   # Validate both
   if not langtag.valid(ilc):
-    print('Invalid language code found:', r['code3'])
+    print('Invalid language code found:', r.code3)
     sys.exit(1)
-  
+
   if not langtag.valid(mlc):
-    print('Invalid language code found:', r['macro3'])
+    print('Invalid language code found:', r.macro3)
     sys.exit(1)
     
   # Store the mapping
   md[ilc] = mlc
 
-# Begin the JSON output
-#
-jsr = io.StringIO()
-jsr.write('{')
-
-# Get a list of all the remapped language subtags and sort them
-#
-tl = list(md)
-tl.sort()
-
-# Write all the mappings to the JSON file
-#
-first_rec = True
-for k in tl:
-  
-  # Get the remapped value
-  v = md[k]
-  
-  # Write the appropriate record separator, if necessary
-  if first_rec:
-    jsr.write('\n')
-    first_rec = False
-  else:
-    jsr.write(',\n')
-  
-  # Write the mapping -- no escaping is necessary since language subtags
-  # just have lowercase ASCII letters
-  jsr.write('  "')
-  jsr.write(k)
-  jsr.write('": "')
-  jsr.write(v)
-  jsr.write('"')
-
-# End the JSON output
-#
-jsr.write('\n}')
-
-# Write the full JSON object to output
+# Serialize the full dictionary to output as JSON, sorting the keys so
+# that the remapped language subtags are in alphabetical order; the
+# C-implemented json encoder handles all the formatting in one call
 #
-print(jsr.getvalue())
+print(json.dumps(md, indent=2, sort_keys=True))
@@ -35,8 +35,9 @@
 # Operation
 # ---------
 #
-# This program begins by using the fulldb module to load the full
-# language tag database into memory and check for consistency.
+# This program begins by using the fulldb_cache module to load the
+# full language tag database into memory, through the disk cache when
+# possible, and check for consistency.
 #
 # Then, the program adds the "him" record from ISO-639-2 that isn't
 # present in the later standards, as well as the GG2 and GG3
@@ -58,29 +59,31 @@
 # second string is the "inverted" name.  For example, "Swiss German" has
 # an inverted name of "German, Swiss".
 #
-# Names are normalized and escaped properly for inclusion in JSON string
-# literals, using the prep() function defined below.  All extended
-# Unicode characters are encoded using JSON Unicode escapes, so that the
-# resulting data file is plain ASCII even though the names can include
-# extended Unicode codepoints.
+# Names are normalized and checked using the prep() function defined
+# below, and then serialized with the standard json module.  All
+# extended Unicode characters are encoded using JSON Unicode escapes,
+# so that the resulting data file is plain ASCII even though the names
+# can include extended Unicode codepoints.
 #
 # Finally, the program prints the generated language name dictionary out
 # to standard output as JSON text.
 #
 
 import fulldb
-import io
+import fulldb_cache
 import iso2
 import iso3
 import iso5
+import json
 import langtag
 import subtag
 import sys
 import unicodedata
 
-# Function to prepare and check a name for storage in a JSON literal.
+# Function to prepare and check a name for storage in the dictionary.
 #
-# This also properly escapes double quote and backslash characters.
+# Escaping for JSON is not performed here, since the json module
+# handles that during serialization.
 #
 # If there is a problem, an error message is displayed and the program
 # is stopped.
@@ -91,7 +94,7 @@ import unicodedata
 #
 # Return:
 #
-#   the prepared name, ready for storage in a JSON string literal
+#   the prepared name
 #
 def prep(s):
   
@@ -100,8 +103,12 @@ def prep(s):
     print('Invalid language name!')
     sys.exit(1)
   
-  # Trim name and normalize to NFC
-  s = unicodedata.normalize('NFC', s.strip())
+  # Trim name and normalize to NFC; normalization can be skipped for
+  # pure ASCII names, which are already in NFC and which account for
+  # nearly all of the names in practice
+  s = s.strip()
+  if not s.isascii():
+    s = unicodedata.normalize('NFC', s)
   
   # Check that name not empty
   if len(s) < 1:
@@ -120,40 +127,9 @@ def prep(s):
         (c > 0xffff):
       print('Language name contains invalid codepoints!')
       sys.exit(1)
-    
-  # Escape backslash and double quotes
-  s = s.replace('\\', '\\\\')
-  s = s.replace('"', '\\"')
-  
-  # Escape any extended characters
-  buf_size = 0
-  result = ''
-  for i in range(0, len(s)):
-    
-    # Get current character code
-    c = ord(s[i])
-    
-    # If character code is in ASCII range, just buffer it and continue
-    if c < 0x80:
-      buf_size = buf_size + 1
-      continue
-    
-    # If we got here, we need an escape, so first of all add any
-    # buffered characters to result and reset buffer
-    if buf_size > 0:
-      result = result + s[i - buf_size:i]
-      buf_size = 0
-    
-    # Add the Unicode escape to the result
-    result += '\\u%04x' % (c)
-  
-  # If anything left over in buffer, add to result
-  if buf_size > 0:
-    result = result + s[len(s) - buf_size:len(s)]
-    buf_size = 0
-  
-  # Return result
-  return result
+
+  # Return the prepared name
+  return s
 
 # Check that we have exactly seven parameters
 #
@@ -177,7 +153,7 @@ dfp.iso5_path = sys.argv[7]
 # data files and check consistency
 #
 try:
-  fulldb.parse_all(dfp)
+  fulldb_cache.load_or_parse(dfp)
 
 except fulldb.FullDBError as fde:
   print('Error while loading full database!')
@@ -208,7 +184,7 @@ except subtag.SubtagError as ste:
 # which is present in ISO-639-2 but not later standards
 #
 nmd = dict()
-exn = iso2.code['him'][1]['en']
+exn = iso2.code['him'].en
 exn = prep(exn)
 exk = langtag.norm('him')
 nmd[exk] = [exn]
@@ -259,15 +235,12 @@ for rr in iso5.rec:
 
 # Go through the ISO-639-3 database and add everything in the name table
 #
-for rr in iso3.rec_name:
-  
-  # Get record fields
-  r = rr[1]
+for r in iso3.rec_name:
   
   # Get relevant fields
-  exk = langtag.norm(r['code3'])
-  exn = prep(r['name'])
-  iexn = prep(r['iname'])
+  exk = langtag.norm(r.code3)
+  exn = prep(r.name)
+  iexn = prep(r.iname)
   
   # Add record, but drop inverted name if same as regular name
   if exn == iexn:
@@ -275,45 +248,18 @@ for rr in iso3.rec_name:
   else:
     nmd[exk] = [exn, iexn]
 
-# Begin the JSON output
-#
-jsr = io.StringIO()
-jsr.write('{')
-
 # Get a list of all the language code keys and sort them
 #
 tl = list(nmd)
 tl.sort()
 
-# Write all the mappings to the JSON file
+# Serialize each mapping with the json module, which handles all the
+# escaping, keeping each mapping on its own line
 #
-first_rec = True
+lines = []
 for k in tl:
-  
-  # Get the remapped value array
-  v = nmd[k]
-  
-  # Write the appropriate record separator, if necessary
-  if first_rec:
-    jsr.write('\n')
-    first_rec = False
-  else:
-    jsr.write(',\n')
-  
-  # Write the mapping
-  jsr.write('  "')
-  jsr.write(langtag.norm(k))
-  jsr.write('": ["')
-  jsr.write(v[0])
-  if len(v) > 1:
-    jsr.write('", "')
-    jsr.write(v[1])
-  jsr.write('"]')
-
-# End the JSON output
-#
-jsr.write('\n}')
+  lines.append('  ' + json.dumps(k) + ': ' + json.dumps(nmd[k]))
 
 # Write the full JSON object to output
 #
-print(jsr.getvalue())
+print('{\n' + ',\n'.join(lines) + '\n}')
@@ -19,6 +19,8 @@
 # will be placed in the subtag.rec variable.
 #
 
+import re
+
 #
 # Exceptions
 # ----------
@@ -389,6 +391,15 @@ class WrongTagTypeError(SubtagError):
 #
 rec = None
 
+# The set of record field names that may appear more than once in a
+# single record.
+#
+# The parsed values of these fields are lists of strings rather than
+# plain strings.  See the rec variable documentation for further
+# information.
+#
+multi_fields = frozenset(('description', 'comments', 'prefix'))
+
 #
 # Local functions
 # ---------------
@@ -699,7 +710,7 @@ def check_record(lnum, f):
     # "description" "comments" and "prefix" field values must be
     # non-empty lists of strings without padding
     val = f[k]
-    if (k == 'description') or (k == 'comments') or (k == 'prefix'):
+    if k in multi_fields:
       # Value must be non-empty list of strings without padding
       if not isinstance(val, list):
         raise LogicError()
@@ -928,30 +939,20 @@ def raw_record(lnum, lines):
   rp = dict()
   for e in lines:
     
-    # Find the location of the first : character, which must be present
-    ci = e.find(':')
-    if ci < 0:
+    # Split into a field name and a field value around the first :
+    # character, which must be present
+    fname, sep, fval = e.partition(':')
+    if len(sep) < 1:
       raise NoColonError(lnum)
-    
-    # Split into a field name and a field value around the colon
-    fname = ''
-    fval = ''
-    if ci > 0:
-      fname = e[0:ci]
-    if ci < len(e) - 1:
-      fval = e[ci + 1:]
-    
-    # Trim field name and field value of leading and trailing space
-    fname = fname.strip(' \t\n')
-    fval = fval.strip(' \t\n')
-    
-    # Convert field name to lowercase
-    fname = fname.lower()
+
+    # Trim field name and field value of leading and trailing space,
+    # and convert the field name to lowercase
+    fname = fname.strip().lower()
+    fval = fval.strip()
     
     # Different handling based on whether the field name is a special
     # field that can occur multiple times
-    if (fname == 'description') or (fname == 'comments') or \
-        (fname == 'prefix'):
+    if fname in multi_fields:
       # This field can occur multiple times, so check if already present
       # and handle differently
       if fname in rp:
@@ -1018,77 +1019,85 @@ def parse(fpath):
   try:
     with open(fpath, mode='rt',
               encoding='utf-8', errors='strict') as fin:
-  
-      # We have the input file open -- read line by line
-      lbuf = []     # Buffers record lines
-      line_num = 0  # Current line number
-      rec_line = 1  # Line at start of current record
-      for line in fin:
-        
-        # Update line count
-        line_num = line_num + 1
-        
-        # Trim trailing whitespace and linebreaks, but NOT leading
-        # whitespace, which is significant in case of line continuations
-        line = line.rstrip(' \t\n')
-        
-        # Filter out blank lines that are empty or contain only spaces,
-        # tabs, and line breaks
-        if len(line) < 1:
-          continue
-        
-        # If this line is %% then handle end of record and continue to
-        # next record
-        if line == '%%':
-          # If the record line of this record is 1, then just clear the
-          # line buffer, update the record line, and continue to next
-          # line without any further processing so that we skip the
-          # special first record
-          if rec_line <= 1:
-            lbuf = []
-            rec_line = line_num + 1
-            continue
-          
-          # If we got here, we're not in the special case of the first
-          # record, so we want to process the raw record
-          raw_record(rec_line, lbuf)
-          
-          # Clear the line buffer and update the record line
-          lbuf = []
-          rec_line = line_num + 1
-          
-          # Continue on to next line
-          continue
-        
-        # If the first character of this line is a tab or a space, then
-        # we have a continuation line, so process that and continue to
-        # next line
-        fchar = line[0]
-        if (fchar == ' ') or (fchar == '\t'):
-          # Continuation line, so this must not be first line of record
-          if len(lbuf) < 1:
-            raise BadContinueLine(line_num)
-          
-          # Drop leading whitespace and replace with a single leading
-          # space
-          line = ' ' + line.lstrip(' \t')
-          
-          # Add this line to the end of the last line in the record line
-          # buffer
-          lbuf[-1] = lbuf[-1] + line
-          
-          # Continue on to next line
+
+      # We have the input file open -- read the whole file into memory
+      # and split it into record blocks around the %% separator lines;
+      # the registry is small enough that bulk operations on the full
+      # text are much faster than a line-by-line reading loop
+      data = fin.read()
+
+      # Prefix the text with a sentinel line break so that a separator
+      # on the very first line of the file still matches the separator
+      # pattern below, and make sure the text ends with a line break so
+      # that a separator on an unterminated final line matches too
+      data = '\n' + data
+      if data[-1] != '\n':
+        data = data + '\n'
+
+      # Split the text into record blocks; the separator pattern
+      # tolerates trailing spaces and tabs on the %% line, and it
+      # consumes the line break before the separator line but only
+      # looks ahead at the line break after it, so that each of a run
+      # of consecutive separator lines is recognized; every non-empty
+      # block therefore carries a leading line break
+      blocks = re.split('\n%%[ \t]*(?=\n)', data)
+
+      # Process each record block; the block that starts the file is
+      # the exceptional first record that just has a timestamp, so skip
+      # that one, unless there is no separator anywhere in the file, in
+      # which case the whole file is a single ordinary record
+      rec_line = 1  # Line at start of current block
+      for i, block in enumerate(blocks):
+
+        # Line number at which the next block will start, which is one
+        # separator line beyond this block; the leading line break that
+        # the block carries stands in for the line break that ends its
+        # last line, so the raw count comes out right
+        next_line = rec_line + block.count('\n') + 1
+
+        # Drop trailing spaces and tabs at the very end of the block
+        # and then drop lines that are empty or contain only spaces and
+        # tabs; this must happen before continuation lines are
+        # collapsed, because a continuation line may be separated from
+        # the line it continues by blank lines
+        block = block.rstrip(' \t')
+        block = re.sub('\n[ \t]*(?=\n)', '', block)
+
+        # A continuation line can never begin a record; index zero of
+        # any non-empty block is its leading line break, so the first
+        # line of the block starts at index one
+        if (len(block) > 1) and \
+            ((block[1] == ' ') or (block[1] == '\t')):
+          raise BadContinueLine(rec_line)
+
+        # Skip the special first record
+        if (i <= 0) and (len(blocks) > 1):
+          rec_line = next_line
           continue
-        
-        # If we got here, we have a regular record line, so just add
-        # that to the line buffer
-        lbuf.append(line)
-    
-      # If after the loop will still have something in the record
-      # buffer, flush this last record
-      if len(lbuf) > 0:
-        raw_record(rec_line, lbuf)
+
+        # Collapse continuation lines so that each logical record line
+        # is on a single physical line, with any whitespace run around
+        # the line break replaced by a single space character
+        block = re.sub('[ \t]*\n[ \t]+', ' ', block)
+
+        # Split the block into logical lines, trimming trailing
+        # whitespace and filtering out blank lines
         lbuf = []
+        for line in block.split('\n'):
+          line = line.rstrip()
+          if len(line) > 0:
+            lbuf.append(line)
+
+        # Process the record; an empty block is only allowed as the
+        # very last block, where it just means the file ends with a
+        # separator line -- an empty block anywhere else still goes
+        # through raw_record so that the missing type field gets
+        # diagnosed
+        if (len(lbuf) > 0) or (i < len(blocks) - 1):
+          raw_record(rec_line, lbuf)
+
+        # Update the line number for the next block
+        rec_line = next_line
     
     # All records have been read in and *individually* verified; now we
     # need to build indices of each record type so we can begin
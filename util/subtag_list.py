@@ -102,7 +102,7 @@ elif len(sys.argv) == 3:
 # category uvar
 #
 if arg_category is not None:
-  arg_category = arg_category.strip(' \t')
+  arg_category = arg_category.strip()
   arg_category = arg_category.lower()
   if arg_category == 'uvar':
     arg_uvar = True
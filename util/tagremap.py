@@ -29,7 +29,6 @@
 # to standard output as JSON text.
 #
 
-import io
 import subtag
 import sys
 
@@ -53,9 +52,10 @@ except subtag.SubtagError as exc:
   print(exc)
   sys.exit(1)
 
-# Begin the JSON output
+# Begin the JSON output, streaming directly to standard output rather
+# than buffering the whole object in memory first
 #
-jsr = io.StringIO()
+jsr = sys.stdout
 jsr.write('{')
 
 # Go through the parsed subtag records and build the dictionary entries
@@ -89,8 +89,4 @@ for rr in subtag.rec:
 
 # End the JSON output
 #
-jsr.write('\n}')
-
-# Write the full JSON object to output
-#
-print(jsr.getvalue())
+jsr.write('\n}\n')
@@ -0,0 +1,115 @@
+#
+# test_subtag.py
+# ==============
+#
+# Regression tests for the record block splitting in the subtag
+# module's parse() function.
+#
+# These cover edge cases of the %% separator handling that the bulk
+# record splitting must treat the same way as a line-by-line read:
+#
+#   (1) a separator line at the very start of the file
+#   (2) blank lines between a record line and its continuation line
+#   (3) a separator on an unterminated final line of the file
+#
+# Run the tests with pytest, or run this module directly as a script.
+#
+# This makes use of the following imported modules:
+#
+import os
+import subtag
+import tempfile
+
+#
+# Local functions
+# ---------------
+#
+
+# Parse the given text as a subtag data file and return the resulting
+# record list.
+#
+# The text is written to a temporary file, the parsed state of the
+# subtag module is reset, and then the file is parsed.
+#
+# Parameters:
+#
+#   data : string - the text of the subtag data file
+#
+# Return:
+#
+#   the parsed record list from the subtag module
+#
+def parse_text(data):
+
+  fd, fpath = tempfile.mkstemp(suffix='.txt')
+  os.close(fd)
+  try:
+    with open(fpath, mode='wt',
+              encoding='utf-8', errors='strict') as fout:
+      fout.write(data)
+    subtag.rec = None
+    subtag.parse(fpath)
+    return subtag.rec
+  finally:
+    os.remove(fpath)
+
+#
+# Test functions
+# --------------
+#
+
+# A separator line at the very start of the file ends the special
+# first record, so the record after it must still be parsed.
+#
+def test_separator_on_first_line():
+  r = parse_text(
+    '%%\n'
+    'Type: language\n'
+    'Subtag: aa\n'
+    'Description: Afar\n')
+  assert len(r) == 1
+  assert r[0][0] == 2
+  assert r[0][1]['subtag'] == 'aa'
+  assert r[0][1]['description'] == ['Afar']
+
+# Blank lines between a record line and its continuation line are
+# dropped before the continuation is joined to its record line.
+#
+def test_blank_line_before_continuation():
+  r = parse_text(
+    'File-Date: 2021-05-08\n'
+    '%%\n'
+    'Type: language\n'
+    'Subtag: aa\n'
+    'Description: Afar\n'
+    '\n'
+    '  extra\n')
+  assert len(r) == 1
+  assert r[0][0] == 3
+  assert r[0][1]['description'] == ['Afar extra']
+
+# A separator on the final line of the file still ends the record
+# before it, even without a trailing line break.
+#
+def test_unterminated_final_separator():
+  r = parse_text(
+    'File-Date: 2021-05-08\n'
+    '%%\n'
+    'Type: language\n'
+    'Subtag: aa\n'
+    'Description: Afar\n'
+    '%%')
+  assert len(r) == 1
+  assert r[0][0] == 3
+  assert r[0][1]['subtag'] == 'aa'
+
+#
+# Script entrypoint
+# -----------------
+#
+
+if __name__ == '__main__':
+  test_separator_on_first_line()
+  test_blank_line_before_continuation()
+  test_unterminated_final_separator()
+  print('All tests passed')